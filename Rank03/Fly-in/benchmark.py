@@ -0,0 +1,368 @@
+# benchmark.py - times parse, graph, solve and simulation on generated maps
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Any, Callable, TypeVar
+from mapgen import GENERATORS
+from map_cache import cache_path, cached_map_parser
+from parser import map_parser
+from graph import Graph
+from pathfinder import Pathfinder, SEARCH_MODES, PLANNERS
+from simulation import SimulationEngine
+
+T = TypeVar("T")
+
+
+def measure(
+    phase: Callable[[], T], memory: bool
+) -> tuple[T, dict[str, float]]:
+    """Runs one phase, recording its wall time and peak traced memory.
+
+    Tracing slows Python code down several times, so the phase is timed
+    untraced and then run a second time under tracemalloc for its peak.
+
+    Args:
+        phase: The work to measure; must be safe to run twice.
+        memory: Whether to do the traced run.
+
+    Returns:
+        The result of the timed run and its stats: `seconds`, plus
+        `peak_bytes` when memory is traced.
+    """
+    start = time.perf_counter()
+    result = phase()
+    stats: dict[str, float] = {"seconds": time.perf_counter() - start}
+    if memory:
+        tracemalloc.start()
+        phase()
+        stats["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, stats
+
+
+def simulate(graph: Graph, paths: list[list[tuple[int, str]]]) -> int:
+    """Runs every simulation turn with the turn lines discarded.
+
+    Args:
+        graph: The map's graph.
+        paths: One (turn, zone_name) path per drone.
+
+    Returns:
+        Number of simulated turns.
+    """
+    turns = 0
+    with open(os.devnull, "w") as sink, redirect_stdout(sink):
+        for _ in SimulationEngine(graph, paths).run():
+            turns += 1
+    return turns
+
+
+def run_case(
+    kind: str,
+    nb_zones: int,
+    nb_drones: int,
+    seed: int,
+    search: str,
+    planner: str,
+    memory: bool,
+) -> dict[str, Any]:
+    """Generates one map and runs the whole pipeline on it.
+
+    Args:
+        kind: Generator name from mapgen.GENERATORS.
+        nb_zones: Requested number of zones.
+        nb_drones: Number of drones.
+        seed: Generator seed.
+        search: Pathfinder search mode.
+        planner: Pathfinder planner.
+        memory: Whether to trace peak memory per phase.
+
+    Returns:
+        The case description, per-phase stats, expanded states and
+        makespan, or the error raised by the planner.
+    """
+    text = GENERATORS[kind](nb_zones, nb_drones, seed)
+    phases: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = os.path.join(tmp, f"{kind}.txt")
+        with open(map_path, "w") as f:
+            f.write(text)
+        data, phases["parse"] = measure(lambda: map_parser(map_path), memory)
+
+    def build() -> Graph:
+        graph = Graph(data)
+        graph.compile()
+        return graph
+
+    graph, phases["graph"] = measure(build, memory)
+
+    def solve() -> tuple[Pathfinder, list[list[tuple[int, str]]]]:
+        pathfinder = Pathfinder(
+            graph, data.nb_drones, search=search, planner=planner
+        )
+        return pathfinder, pathfinder.solve()
+
+    case: dict[str, Any] = {
+        "kind": kind,
+        "zones": len(data.zones),
+        "connections": len(data.connections),
+        "drones": data.nb_drones,
+        "seed": seed,
+        "search": search,
+        "planner": planner,
+        "phases": phases,
+        "expanded": 0,
+        "makespan": None,
+        "error": None,
+    }
+    try:
+        (pathfinder, paths), phases["solve"] = measure(solve, memory)
+    except ValueError as e:
+        case["error"] = str(e)
+        return case
+    _, phases["simulate"] = measure(lambda: simulate(graph, paths), memory)
+    case["expanded"] = pathfinder.expanded
+    case["makespan"] = max((p[-1][0] for p in paths if p), default=0)
+    return case
+
+
+def parse_case(kind: str, nb_zones: int, seed: int) -> dict[str, Any]:
+    """Times the parser and the map cache on one generated map.
+
+    Args:
+        kind: Generator name from mapgen.GENERATORS.
+        nb_zones: Requested number of zones.
+        seed: Generator seed.
+
+    Returns:
+        The case description, line count and per-phase stats of a full
+        parse, a cache miss (parse and cache write) and a cache hit.
+    """
+    text = GENERATORS[kind](nb_zones, 1, seed)
+    phases: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = os.path.join(tmp, f"{kind}.txt")
+        with open(map_path, "w") as f:
+            f.write(text)
+        data, phases["parse"] = measure(lambda: map_parser(map_path), False)
+
+        def miss() -> None:
+            if os.path.exists(cache_path(map_path)):
+                os.remove(cache_path(map_path))
+            cached_map_parser(map_path)
+
+        _, phases["cache_miss"] = measure(miss, False)
+        _, phases["cache_hit"] = measure(
+            lambda: cached_map_parser(map_path), False
+        )
+    lines = text.count("\n")
+    return {
+        "kind": kind,
+        "zones": len(data.zones),
+        "connections": len(data.connections),
+        "lines": lines,
+        "seed": seed,
+        "phases": phases,
+        "lines_per_second": lines / phases["parse"]["seconds"],
+    }
+
+
+def render_case(
+    kind: str, nb_zones: int, nb_drones: int, seed: int, frames: int
+) -> dict[str, Any]:
+    """Measures the frame rate of the visualizer on one generated map.
+
+    Frames are drawn on SDL's dummy video driver unless another one is
+    set, so no window opens and the rate is that of the CPU drawing
+    alone; display.flip() is not included.
+
+    Args:
+        kind: Generator name from mapgen.GENERATORS.
+        nb_zones: Requested number of zones.
+        nb_drones: Number of drones, spread over the zones.
+        seed: Generator seed.
+        frames: Number of frames drawn per mode.
+
+    Returns:
+        The case description and frames per second when the map is
+        redrawn every frame (`uncached`), blitted from the cached layer
+        (`cached`), panned by a few pixels each frame (`pan`) and, for
+        `frame`, with every drone drawn on top, the first frame included.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # pygame and numpy are only needed here
+    import numpy as np
+    from visualizer import Visualizer
+
+    text = GENERATORS[kind](nb_zones, 1, seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        map_path = os.path.join(tmp, f"{kind}.txt")
+        with open(map_path, "w") as f:
+            f.write(text)
+        data = map_parser(map_path)
+    viz = Visualizer(Graph(data))
+    # drones slide between neighbouring zones, as in main.py
+    layout = np.array(
+        [viz.zone_to_layout(zone) for zone in data.zones.values()],
+        dtype=np.float64,
+    )
+    spots = np.arange(nb_drones) % len(layout)
+    old_pos = layout[spots]
+    new_pos = layout[(spots + 1) % len(layout)]
+    sprites = [viz.drone_sprite(f"D{i + 1}") for i in range(nb_drones)]
+    surfaces = [surf for surf, _ in sprites]
+    anchors = np.array(
+        [anchor for _, anchor in sprites], dtype=np.int64
+    ).reshape(nb_drones, 2)
+    progress = 0.0
+
+    def uncached() -> None:
+        viz.render_map(viz.screen)
+
+    def cached() -> None:
+        viz.draw_background()
+
+    def pan() -> None:
+        viz.pan(4, 3)
+        viz.draw_background()
+
+    def full() -> None:
+        nonlocal progress
+        progress = (progress + 0.05) % 1.0
+        viz.draw_background()
+        current = old_pos + (new_pos - old_pos) * progress
+        viz.draw_drone_layer(surfaces, current, anchors)
+
+    fps: dict[str, float] = {}
+    for name, frame in (
+        ("uncached", uncached),
+        ("cached", cached),
+        ("pan", pan),
+        ("frame", full),
+    ):
+        viz.fit_view()
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame()
+        fps[name] = frames / (time.perf_counter() - start)
+    return {
+        "kind": kind,
+        "zones": len(data.zones),
+        "connections": len(data.connections),
+        "drones": nb_drones,
+        "seed": seed,
+        "frames": frames,
+        "fps": fps,
+    }
+
+
+def current_commit() -> str | None:
+    """Returns the short hash of the checked-out commit, if any."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def main() -> None:
+    """Runs every kind x zones x drones case and writes the results."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Fly-in pipeline on generated maps."
+    )
+    parser.add_argument(
+        "--kinds", nargs="+", choices=sorted(GENERATORS),
+        default=list(GENERATORS),
+    )
+    parser.add_argument("--zones", nargs="+", type=int, default=[100, 400])
+    parser.add_argument("--drones", nargs="+", type=int, default=[10, 50])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--search", choices=SEARCH_MODES, default="dijkstra")
+    parser.add_argument("--planner", choices=PLANNERS, default="prioritized")
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="skip the traced second run of each phase",
+    )
+    parser.add_argument(
+        "--parse", action="store_true",
+        help="only time parsing and the map cache (drones are ignored)",
+    )
+    parser.add_argument(
+        "--render", type=int, metavar="FRAMES",
+        help="only measure the visualizer frame rate over FRAMES frames",
+    )
+    parser.add_argument("-o", "--output", help="JSON file (default stdout)")
+    args = parser.parse_args()
+
+    cases = []
+    for kind in args.kinds:
+        for nb_zones in args.zones:
+            if args.render:
+                for nb_drones in args.drones:
+                    case = render_case(
+                        kind, nb_zones, nb_drones, args.seed, args.render
+                    )
+                    cases.append(case)
+                    fps = case["fps"]
+                    print(
+                        f"{kind:<10} {case['zones']:>6} zones "
+                        f"{nb_drones:>5} drones  fps uncached "
+                        f"{fps['uncached']:8.1f}  cached "
+                        f"{fps['cached']:8.1f}  pan {fps['pan']:8.1f}  "
+                        f"frame {fps['frame']:8.1f}",
+                        file=sys.stderr,
+                    )
+                continue
+            if args.parse:
+                case = parse_case(kind, nb_zones, args.seed)
+                cases.append(case)
+                print(
+                    f"{kind:<10} {case['lines']:>9} lines  parse "
+                    f"{case['phases']['parse']['seconds']:8.3f}s  "
+                    f"{case['lines_per_second']:>9.0f} lines/s  cache hit "
+                    f"{case['phases']['cache_hit']['seconds']:8.3f}s",
+                    file=sys.stderr,
+                )
+                continue
+            for nb_drones in args.drones:
+                case = run_case(
+                    kind, nb_zones, nb_drones, args.seed,
+                    args.search, args.planner, not args.no_memory,
+                )
+                cases.append(case)
+                solve = case["phases"].get("solve", {}).get("seconds", 0.0)
+                print(
+                    f"{kind:<10} {case['zones']:>6} zones "
+                    f"{nb_drones:>5} drones  solve {solve:8.3f}s  "
+                    f"expanded {case['expanded']:>9}  "
+                    f"makespan {case['makespan']}",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": cases,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# cbs.py - conflict-based search for minimum-makespan planning
+import heapq
+import time
+from typing import TYPE_CHECKING
+from graph import CompiledGraph
+
+if TYPE_CHECKING:
+    from pathfinder import Pathfinder
+
+# a conflict: (turn, is_link, zone_or_edge_id, drones involved)
+Conflict = tuple[int, bool, int, list[int]]
+
+
+class CBSNode:
+    """One node of the constraint tree: a constraint set and its paths."""
+
+    def __init__(
+        self,
+        zone_constraints: dict[int, frozenset[int]],
+        link_constraints: dict[int, frozenset[int]],
+        paths: list[list[tuple[int, int]]],
+    ) -> None:
+        # per drone: forbidden `turn * nb_zones + zone` codes
+        self.zone_constraints = zone_constraints
+        # per drone: forbidden `turn * nb_edges + edge` codes
+        self.link_constraints = link_constraints
+        self.paths = paths
+        self.makespan = max((p[-1][0] for p in paths), default=0)
+        self.cost = sum(p[-1][0] for p in paths)
+
+
+def find_first_conflict(
+    graph: CompiledGraph, paths: list[list[tuple[int, int]]]
+) -> Conflict | None:
+    """Finds the earliest capacity violation in a set of paths.
+
+    Occupancy follows the reservation rules: a drone occupies a zone at
+    every arrival turn of its path (waits included) and a link on every
+    transit turn of a move. Start and end hubs never conflict.
+
+    Args:
+        graph: Compiled graph the paths run on.
+        paths: One (turn, zone_id) path per drone.
+
+    Returns:
+        The earliest conflict, or None if the paths are compatible.
+    """
+    n, m = graph.nb_zones, graph.nb_edges
+    zone_users: dict[int, list[int]] = {}
+    link_users: dict[int, list[int]] = {}
+    for drone, path in enumerate(paths):
+        for j in range(len(path) - 1):
+            t_from, z_from = path[j]
+            t_to, z_to = path[j + 1]
+            if z_to != graph.start and z_to != graph.end:
+                zone_users.setdefault(t_to * n + z_to, []).append(drone)
+            if z_from != z_to:
+                edge = graph.edge_between(z_from, z_to)
+                for t in range(t_from, t_to):
+                    link_users.setdefault(t * m + edge, []).append(drone)
+
+    best: Conflict | None = None
+    for code, drones in zone_users.items():
+        turn, zone = divmod(code, n)
+        if len(drones) > graph.capacity[zone] and (
+            best is None or turn < best[0]
+        ):
+            best = (turn, False, zone, drones)
+    for code, drones in link_users.items():
+        turn, edge = divmod(code, m)
+        if len(drones) > graph.edge_capacity[edge] and (
+            best is None or turn < best[0]
+        ):
+            best = (turn, True, edge, drones)
+    return best
+
+
+class CBSPlanner:
+    """Conflict-Based Search minimizing makespan, then total arrival turns.
+
+    The high level branches on the earliest over-capacity zone or link. For
+    a resource of capacity k used by more than k drones, it creates k + 1
+    children, each forbidding one of the first k + 1 drones from using the
+    resource on that turn, since at least one of them must leave in any
+    valid plan. The low level is Pathfinder._find_path run on an empty
+    reservation table with the drone's constraints.
+    """
+
+    def __init__(
+        self,
+        low_level: "Pathfinder",
+        node_budget: int,
+        time_budget: float,
+    ) -> None:
+        self.low_level = low_level
+        self.graph = low_level.graph
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        # constraint-tree nodes expanded by the last solve()
+        self.nodes = 0
+        # True if the last solve() stopped on its node or time budget
+        self.exhausted = False
+
+    def _replan(
+        self,
+        drone: int,
+        zone_constraints: frozenset[int],
+        link_constraints: frozenset[int],
+    ) -> list[tuple[int, int]]:
+        """Plans one drone from turn 0 under its constraints.
+
+        Args:
+            drone: Drone index.
+            zone_constraints: Forbidden `turn * nb_zones + zone` codes.
+            link_constraints: Forbidden `turn * nb_edges + edge` codes.
+
+        Returns:
+            The drone's (turn, zone_id) path, or empty if none exists.
+        """
+        self.low_level.forbidden_zones = zone_constraints
+        self.low_level.forbidden_links = link_constraints
+        return self.low_level._find_path(0)
+
+    def solve(
+        self, nb_drones: int, upper_bound: int
+    ) -> list[list[tuple[int, int]]] | None:
+        """Searches for a conflict-free plan shorter than `upper_bound`.
+
+        Args:
+            nb_drones: Number of drones to plan.
+            upper_bound: Makespan of the best known plan; nodes that cannot
+                beat it are pruned.
+
+        Returns:
+            Paths of a plan with makespan below `upper_bound`, or None if
+            the budgets ran out or no shorter plan exists.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        self.nodes = 0
+        self.exhausted = False
+        empty: frozenset[int] = frozenset()
+
+        first = self._replan(0, empty, empty)
+        if not first:
+            return None
+        # without constraints every drone takes the same shortest route
+        root = CBSNode({}, {}, [first] * nb_drones)
+        if root.makespan >= upper_bound:
+            return None
+
+        # heap entry: (makespan, total arrival turns, tie id, node)
+        open_list: list[tuple[int, int, int, CBSNode]] = [
+            (root.makespan, root.cost, 0, root)
+        ]
+        tie = 1
+
+        while open_list:
+            if (
+                self.nodes >= self.node_budget
+                or time.perf_counter() > deadline
+            ):
+                self.exhausted = True
+                return None
+            _, _, _, node = heapq.heappop(open_list)
+            self.nodes += 1
+
+            conflict = find_first_conflict(self.graph, node.paths)
+            if conflict is None:
+                return node.paths
+
+            turn, is_link, resource, drones = conflict
+            capacity = (
+                self.graph.edge_capacity[resource]
+                if is_link
+                else self.graph.capacity[resource]
+            )
+            for drone in drones[:capacity + 1]:
+                zone_cons = dict(node.zone_constraints)
+                link_cons = dict(node.link_constraints)
+                if is_link:
+                    code = turn * self.graph.nb_edges + resource
+                    link_cons[drone] = link_cons.get(drone, empty) | {code}
+                else:
+                    code = turn * self.graph.nb_zones + resource
+                    zone_cons[drone] = zone_cons.get(drone, empty) | {code}
+
+                path = self._replan(
+                    drone,
+                    zone_cons.get(drone, empty),
+                    link_cons.get(drone, empty),
+                )
+                if not path:
+                    continue
+                paths = list(node.paths)
+                paths[drone] = path
+                child = CBSNode(zone_cons, link_cons, paths)
+                if child.makespan >= upper_bound:
+                    continue
+                heapq.heappush(
+                    open_list, (child.makespan, child.cost, tie, child)
+                )
+                tie += 1
+
+        return None
@@ -0,0 +1,134 @@
+# distances.py - distance-to-goal field repaired incrementally on closures
+import heapq
+from array import array
+from graph import CompiledGraph
+
+
+class DistanceField:
+    """Static turns-to-goal per zone, kept exact while zones and links close.
+
+    The field starts from CompiledGraph.distances_to_end() and remembers,
+    for every zone, the neighbour its shortest route continues through.
+    Closing zones or links only invalidates the zones whose route ran
+    through them. Those are settled again by a Dijkstra seeded from their
+    still-valid neighbours, in the spirit of LPA*, so the work done by
+    earlier updates is reused instead of recomputing the whole field.
+
+    A closed zone can still be left, so its own distance stays defined,
+    but no route may enter it.
+    """
+
+    def __init__(self, graph: CompiledGraph) -> None:
+        self.graph = graph
+        # turns to the end hub per zone id, -1 if it cannot be reached
+        self.dist = array("i", graph.distances_to_end())
+        self.closed_zones: set[int] = set()
+        self.closed_edges: set[int] = set()
+        # zones settled again by the last close()
+        self.repaired = 0
+
+        # next zone and edge on a shortest route to the end hub, -1 if none
+        n = graph.nb_zones
+        self.next_zone = array("i", [-1]) * n
+        self.next_edge = array("i", [-1]) * n
+        for z in range(n):
+            if z != graph.end and self.dist[z] >= 0:
+                _, self.next_zone[z], self.next_edge[z] = self._best_exit(
+                    z, set()
+                )
+
+    def _best_exit(
+        self, zone: int, invalid: set[int]
+    ) -> tuple[int, int, int]:
+        """Finds the cheapest open move out of a zone towards the end hub.
+
+        Args:
+            zone: Zone id to leave.
+            invalid: Zones whose distance is being recomputed.
+
+        Returns:
+            (distance through the move, next zone, edge), or (-1, -1, -1)
+            if no open neighbour reaches the end hub.
+        """
+        cg = self.graph
+        best = (-1, -1, -1)
+        for k in range(cg.adj_offsets[zone], cg.adj_offsets[zone + 1]):
+            neighbor, edge = cg.adj_targets[k], cg.adj_edges[k]
+            cost = cg.move_cost[neighbor]
+            if (
+                cost <= 0
+                or self.dist[neighbor] < 0
+                or neighbor in invalid
+                or neighbor in self.closed_zones
+                or edge in self.closed_edges
+            ):
+                continue
+            d = cost + self.dist[neighbor]
+            if best[0] < 0 or d < best[0]:
+                best = (d, neighbor, edge)
+        return best
+
+    def close(self, zones: set[int], edges: set[int]) -> None:
+        """Removes zones and links from the field and repairs it.
+
+        Args:
+            zones: Zone ids that can no longer be entered.
+            edges: Edge ids that can no longer be used.
+        """
+        cg = self.graph
+        zones = zones - self.closed_zones
+        edges = edges - self.closed_edges
+        self.closed_zones |= zones
+        self.closed_edges |= edges
+        self.repaired = 0
+        if not zones and not edges:
+            return
+
+        # invalidate every zone whose shortest route used a closed element
+        children: list[list[int]] = [[] for _ in range(cg.nb_zones)]
+        stack: list[int] = []
+        for z in range(cg.nb_zones):
+            nxt = self.next_zone[z]
+            if nxt < 0:
+                continue
+            if nxt in zones or self.next_edge[z] in edges:
+                stack.append(z)
+            else:
+                children[nxt].append(z)
+        invalid: set[int] = set()
+        while stack:
+            z = stack.pop()
+            if z in invalid:
+                continue
+            invalid.add(z)
+            stack.extend(children[z])
+
+        # seed each invalid zone from its best still-valid exit
+        pq: list[tuple[int, int, int, int]] = []
+        for z in invalid:
+            self.dist[z] = -1
+            self.next_zone[z] = -1
+            self.next_edge[z] = -1
+        for z in invalid:
+            d, nxt, edge = self._best_exit(z, invalid)
+            if nxt >= 0:
+                pq.append((d, z, nxt, edge))
+        heapq.heapify(pq)
+
+        # dijkstra restricted to the invalidated zones
+        while pq:
+            d, z, nxt, edge = heapq.heappop(pq)
+            if z not in invalid:
+                continue
+            invalid.discard(z)
+            self.repaired += 1
+            self.dist[z] = d
+            self.next_zone[z] = nxt
+            self.next_edge[z] = edge
+            cost = cg.move_cost[z]
+            if cost <= 0 or z in self.closed_zones:
+                continue
+            for k in range(cg.adj_offsets[z], cg.adj_offsets[z + 1]):
+                prev, prev_edge = cg.adj_targets[k], cg.adj_edges[k]
+                if prev in invalid and prev_edge not in self.closed_edges:
+                    heapq.heappush(pq, (d + cost, prev, z, prev_edge))
@@ -0,0 +1,267 @@
+# flow.py - min-cost flow router for large fleets of identical drones
+import heapq
+from typing import TYPE_CHECKING
+from graph import CompiledGraph
+
+if TYPE_CHECKING:
+    from pathfinder import Pathfinder
+
+
+class FlowNetwork:
+    """Residual network for successive-shortest-path min-cost flow.
+
+    Arcs are stored in flat lists; arc `a ^ 1` is the reverse of arc `a`.
+    """
+
+    def __init__(self, nb_nodes: int) -> None:
+        self.nb_nodes = nb_nodes
+        self.arcs_from: list[list[int]] = [[] for _ in range(nb_nodes)]
+        self.head: list[int] = []
+        self.cap: list[int] = []
+        self.cost: list[int] = []
+        # capacity each arc was created with, used to read back the flow
+        self.initial_cap: list[int] = []
+
+    def add_arc(self, u: int, v: int, cap: int, cost: int) -> None:
+        """Adds arc u -> v and its zero-capacity reverse arc.
+
+        Args:
+            u: Tail node.
+            v: Head node.
+            cap: Arc capacity.
+            cost: Cost per unit of flow.
+        """
+        for tail, head, c, w in ((u, v, cap, cost), (v, u, 0, -cost)):
+            self.arcs_from[tail].append(len(self.head))
+            self.head.append(head)
+            self.cap.append(c)
+            self.cost.append(w)
+            self.initial_cap.append(c)
+
+    def augment(
+        self, source: int, sink: int, limit: int, potential: list[int]
+    ) -> tuple[int, list[int], bool]:
+        """Pushes flow along one cheapest residual path.
+
+        Uses Dijkstra on reduced costs and updates the node potentials.
+
+        Args:
+            source: Source node.
+            sink: Sink node.
+            limit: Maximum amount of flow to push.
+            potential: Node potentials, updated in place.
+
+        Returns:
+            (amount pushed, nodes of the path, whether it used a reverse
+            arc and so rerouted earlier flow).
+        """
+        inf = 1 << 60
+        dist = [inf] * self.nb_nodes
+        prev_arc = [-1] * self.nb_nodes
+        dist[source] = 0
+        pq: list[tuple[int, int]] = [(0, source)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            for a in self.arcs_from[u]:
+                if self.cap[a] <= 0:
+                    continue
+                v = self.head[a]
+                nd = d + self.cost[a] + potential[u] - potential[v]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    prev_arc[v] = a
+                    heapq.heappush(pq, (nd, v))
+        if dist[sink] == inf:
+            return 0, [], False
+
+        for v in range(self.nb_nodes):
+            if dist[v] < inf:
+                potential[v] += dist[v]
+
+        amount = limit
+        v = sink
+        while v != source:
+            a = prev_arc[v]
+            amount = min(amount, self.cap[a])
+            v = self.head[a ^ 1]
+        used_reverse = False
+        nodes = [sink]
+        v = sink
+        while v != source:
+            a = prev_arc[v]
+            self.cap[a] -= amount
+            self.cap[a ^ 1] += amount
+            used_reverse = used_reverse or a % 2 == 1
+            v = self.head[a ^ 1]
+            nodes.append(v)
+        nodes.reverse()
+        return amount, nodes, used_reverse
+
+    def decompose(self, source: int, sink: int) -> list[list[int]]:
+        """Splits the current flow into source-to-sink node paths.
+
+        Args:
+            source: Source node.
+            sink: Sink node.
+
+        Returns:
+            One node sequence per distinct flow path.
+        """
+        flow = [
+            self.initial_cap[a] - self.cap[a] if a % 2 == 0 else 0
+            for a in range(len(self.head))
+        ]
+        paths: list[list[int]] = []
+        while True:
+            nodes = [source]
+            arcs: list[int] = []
+            u = source
+            seen = {source}
+            while u != sink:
+                nxt = next(
+                    (a for a in self.arcs_from[u] if flow[a] > 0), -1
+                )
+                if nxt < 0 or self.head[nxt] in seen:
+                    break
+                arcs.append(nxt)
+                u = self.head[nxt]
+                seen.add(u)
+                nodes.append(u)
+            if u != sink:
+                return paths
+            amount = min(flow[a] for a in arcs)
+            for a in arcs:
+                flow[a] -= amount
+            paths.append(nodes)
+
+
+class FlowPlanner:
+    """Routes a whole fleet from a min-cost flow instead of per-drone search.
+
+    The static network splits every zone into an in and an out node, so
+    zone capacity becomes an arc capacity, and gives every link direction
+    an arc whose cost is the move cost of its destination. Capacities are
+    counted per period of `P` turns, where `P` is the longest move cost,
+    so a capacity-1 link into a restricted zone still carries one drone
+    every two turns. A min-cost flow in this network is the repeating
+    pattern of a flow over the time-expanded network.
+
+    Successive shortest paths yield a growing set of routes. Drones are
+    then dispatched greedily onto time-shifted copies of those routes in
+    order of earliest arrival. Each copy is checked and booked against the
+    reservation table, so the plan obeys exactly the same capacity rules as
+    the search-based planners.
+    """
+
+    def __init__(self, pathfinder: "Pathfinder") -> None:
+        self.pathfinder = pathfinder
+        self.graph: CompiledGraph = pathfinder.graph
+        # routes found by the flow, as zone-id sequences from start to end
+        self.routes: list[list[int]] = []
+
+    def _build_network(self, nb_drones: int) -> FlowNetwork:
+        """Builds the node-split static network of the compiled graph.
+
+        Args:
+            nb_drones: Fleet size, used to bound hub capacities.
+
+        Returns:
+            The residual network with zone z split into nodes 2z and 2z+1.
+        """
+        cg = self.graph
+        period = max(cg.move_cost, default=1)
+        hub_cap = nb_drones * period
+        net = FlowNetwork(2 * cg.nb_zones)
+        for z in range(cg.nb_zones):
+            if cg.move_cost[z] > 0:
+                if z == cg.start or z == cg.end:
+                    cap = hub_cap
+                else:
+                    cap = cg.capacity[z] * period
+                net.add_arc(2 * z, 2 * z + 1, cap, 0)
+        for e in range(cg.nb_edges):
+            u, v = cg.edge_u[e], cg.edge_v[e]
+            for a, b in ((u, v), (v, u)):
+                cost = cg.move_cost[b]
+                if cost <= 0 or cg.move_cost[a] <= 0:
+                    continue
+                cap = cg.edge_capacity[e] * period // cost
+                if cap > 0:
+                    net.add_arc(2 * a + 1, 2 * b, cap, cost)
+        return net
+
+    def _find_routes(self, nb_drones: int) -> None:
+        """Runs min-cost flow and collects every route it ever uses.
+
+        Routes from earlier, cheaper flow values are kept even when a later
+        augmentation reroutes them, since a small fleet may do better on
+        the short routes than on the max-flow set.
+
+        Args:
+            nb_drones: Fleet size, which bounds the flow value.
+        """
+        cg = self.graph
+        net = self._build_network(nb_drones)
+        source, sink = 2 * cg.start + 1, 2 * cg.end
+        period = max(cg.move_cost, default=1)
+        limit = nb_drones * period
+        potential = [0] * net.nb_nodes
+        seen: set[tuple[int, ...]] = set()
+
+        flow = 0
+        while flow < limit:
+            amount, nodes, rerouted = net.augment(
+                source, sink, limit - flow, potential
+            )
+            if amount == 0:
+                break
+            flow += amount
+            # a path that cancels earlier flow changes existing routes
+            node_paths = (
+                net.decompose(source, sink) if rerouted else [nodes]
+            )
+            for nodes in node_paths:
+                route = tuple(node // 2 for node in nodes[::2]) + (cg.end,)
+                if route not in seen:
+                    seen.add(route)
+                    self.routes.append(list(route))
+
+    def solve(self, nb_drones: int) -> list[list[tuple[int, int]]]:
+        """Plans all drones on shifted copies of the flow routes.
+
+        Args:
+            nb_drones: Number of drones to plan.
+
+        Returns:
+            One (turn, zone_id) path per drone, earliest arrival first.
+        """
+        cg = self.graph
+        self._find_routes(nb_drones)
+        if not self.routes:
+            raise ValueError(
+                "[ERROR] D1 could not find a path to the goal!"
+                "\nPathfinding is impossible on this map."
+            )
+
+        lengths = [
+            sum(cg.move_cost[z] for z in route[1:]) for route in self.routes
+        ]
+        # heap entry: (arrival turn, route length, route index, departure)
+        pq = [(length, length, k, 0) for k, length in enumerate(lengths)]
+        heapq.heapify(pq)
+
+        paths: list[list[tuple[int, int]]] = []
+        while len(paths) < nb_drones:
+            arrival, length, k, departure = heapq.heappop(pq)
+            path = self.pathfinder._route_at(self.routes[k], departure)
+            if path is None:
+                # shift this route one turn later
+                heapq.heappush(pq, (arrival + 1, length, k, departure + 1))
+                continue
+            self.pathfinder._reserve_path(path)
+            paths.append(path)
+            # the same departure may still have spare capacity
+            heapq.heappush(pq, (arrival, length, k, departure))
+        return paths
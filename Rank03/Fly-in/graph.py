@@ -1,4 +1,6 @@
 # graph.py - graph structure for zones and connections
+import heapq
+from array import array
 from data import Zone, Connection, MapStructure
 
 
@@ -15,6 +17,7 @@ class Graph:
         self.zones: dict[str, Zone] = map_structure.zones
         self.start_zone: Zone = map_structure.start_hub
         self.end_zone: Zone = map_structure.end_hub
+        self.nb_drones: int = map_structure.nb_drones
 
         # connection lookup: frozenset({A, B}) -> connection
         # using frozenset because connections are bidirectional:
@@ -33,6 +36,9 @@ class Graph:
             self.adjacency[cnx.zone1].append(cnx.zone2)
             self.adjacency[cnx.zone2].append(cnx.zone1)
 
+        # integer-interned form, built lazily by compile()
+        self._compiled: CompiledGraph | None = None
+
     def get_neighbours(self, z_name: str) -> list[str]:
         """Returns all neighboring zones for a given zone.
 
@@ -88,3 +94,156 @@ class Graph:
             return 2
         # normal and priority zones cost 1 turn
         return 1
+
+    def compile(self) -> "CompiledGraph":
+        """Returns the integer-interned form of this graph.
+
+        The compiled graph is built once and cached on the instance.
+
+        Returns:
+            The CompiledGraph for this network.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledGraph(self)
+        return self._compiled
+
+
+# zone type codes used by the compiled graph
+ZONE_NORMAL = 0
+ZONE_RESTRICTED = 1
+ZONE_PRIORITY = 2
+ZONE_BLOCKED = 3
+
+ZONE_TYPE_CODES: dict[str, int] = {
+    "normal": ZONE_NORMAL,
+    "restricted": ZONE_RESTRICTED,
+    "priority": ZONE_PRIORITY,
+    "blocked": ZONE_BLOCKED,
+}
+
+
+class CompiledGraph:
+    """Integer-interned, array-backed form of a Graph used by the planner.
+
+    Zone ids follow the sorted order of zone names, so comparing ids gives
+    the same ordering as comparing names. Adjacency is stored in CSR form:
+    the neighbours of zone `z` are `adj_targets[adj_offsets[z]:
+    adj_offsets[z + 1]]`, and `adj_edges` holds the matching link ids.
+
+    Zone and link capacities are clamped to the fleet size, since no plan
+    can ever put more drones in one place. The start and end hubs accept
+    any number of drones; planners recognise them by id, not by capacity.
+    """
+
+    def __init__(self, graph: Graph) -> None:
+        self.names: list[str] = sorted(graph.zones)
+        self.index: dict[str, int] = {
+            name: z_id for z_id, name in enumerate(self.names)
+        }
+        self.nb_zones = len(self.names)
+        self.start = self.index[graph.start_zone.name]
+        self.end = self.index[graph.end_zone.name]
+        # the most drones a plan can ever put in one zone or link
+        fleet = max(graph.nb_drones, 1)
+
+        # per-zone arrays
+        self.zone_type = array("b", bytes(self.nb_zones))
+        self.move_cost = array("b", bytes(self.nb_zones))
+        self.capacity = array("i", bytes(4 * self.nb_zones))
+        for z_id, name in enumerate(self.names):
+            zone = graph.zones[name]
+            code = ZONE_TYPE_CODES[zone.zone_type]
+            self.zone_type[z_id] = code
+            self.move_cost[z_id] = graph.get_move_cost(name)
+            self.capacity[z_id] = min(zone.max_drones, fleet)
+        # start and end hubs hold the whole fleet per subject rules
+        self.capacity[self.start] = fleet
+        self.capacity[self.end] = fleet
+
+        # per-edge arrays, in the order links appear in the map
+        self.edge_u = array("i")
+        self.edge_v = array("i")
+        self.edge_capacity = array("i")
+        edge_ids: dict[frozenset[str], int] = {}
+        for key, cnx in graph.connections.items():
+            edge_ids[key] = len(self.edge_u)
+            self.edge_u.append(self.index[cnx.zone1])
+            self.edge_v.append(self.index[cnx.zone2])
+            self.edge_capacity.append(min(cnx.max_link_capacity, fleet))
+        self.nb_edges = len(self.edge_u)
+
+        # CSR adjacency, keeping the neighbour order of Graph.adjacency
+        self.adj_offsets = array("i", [0])
+        self.adj_targets = array("i")
+        self.adj_edges = array("i")
+        for name in self.names:
+            for neighbour in graph.adjacency[name]:
+                self.adj_targets.append(self.index[neighbour])
+                self.adj_edges.append(
+                    edge_ids[frozenset({name, neighbour})]
+                )
+            self.adj_offsets.append(len(self.adj_targets))
+
+        # reverse distances to the end hub, built lazily
+        self._dist_to_end: "array[int] | None" = None
+
+    def compile(self) -> "CompiledGraph":
+        """Returns self, so planners accept a Graph or a CompiledGraph."""
+        return self
+
+    def neighbours(self, z_id: int) -> list[tuple[int, int]]:
+        """Returns the neighbours of a zone with the linking edge ids.
+
+        Args:
+            z_id: Id of the origin zone.
+
+        Returns:
+            List of (neighbour_id, edge_id) pairs.
+        """
+        lo, hi = self.adj_offsets[z_id], self.adj_offsets[z_id + 1]
+        return list(zip(self.adj_targets[lo:hi], self.adj_edges[lo:hi]))
+
+    def edge_between(self, z1: int, z2: int) -> int:
+        """Looks up the edge id linking two zones.
+
+        Args:
+            z1: First zone id.
+            z2: Second zone id.
+
+        Returns:
+            The edge id, or -1 if the zones are not linked.
+        """
+        for neighbour, edge in self.neighbours(z1):
+            if neighbour == z2:
+                return edge
+        return -1
+
+    def distances_to_end(self) -> "array[int]":
+        """Returns the static turn distance from every zone to the end hub.
+
+        Runs one reverse Dijkstra from the end hub over move costs,
+        ignoring capacities and reservations, so each value is a lower
+        bound on the remaining turns of any drone. The result is cached.
+
+        Returns:
+            Array of distances indexed by zone id, -1 when unreachable.
+        """
+        if self._dist_to_end is not None:
+            return self._dist_to_end
+
+        dist = array("i", [-1]) * self.nb_zones
+        pq: list[tuple[int, int]] = [(0, self.end)]
+        while pq:
+            d, zone = heapq.heappop(pq)
+            if dist[zone] >= 0:
+                continue
+            dist[zone] = d
+            # any neighbour can step into `zone` for its move cost
+            enter_cost = self.move_cost[zone]
+            for k in range(self.adj_offsets[zone], self.adj_offsets[zone + 1]):
+                prev = self.adj_targets[k]
+                if dist[prev] < 0 and self.zone_type[prev] != ZONE_BLOCKED:
+                    heapq.heappush(pq, (d + enter_cost, prev))
+
+        self._dist_to_end = dist
+        return dist
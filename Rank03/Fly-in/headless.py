@@ -0,0 +1,154 @@
+# headless.py - batch entry point: plans a map and streams the move log
+import argparse
+import json
+import sys
+from parser import map_parser, ParsingError
+from graph import Graph
+from map_cache import cached_map_parser
+from pathfinder import Pathfinder, SEARCH_MODES, PLANNERS
+from plan import CompactPlan
+from plan_cache import PlanCache
+from stats import PlannerStats, profiled
+from simulation import SimulationEngine
+
+# output buffer size, large enough that a turn line never forces a flush
+BUFFER_SIZE = 1 << 16
+
+
+def main() -> int:
+    """Headless program entry point, never imports pygame.
+
+    Returns:
+        Process exit code: 0 on success, 1 on a parsing or planning error.
+    """
+    parser = argparse.ArgumentParser(
+        description="Plan a Fly-in map and write the move log."
+    )
+    parser.add_argument("map", nargs="?", default="map.txt")
+    parser.add_argument("-o", "--output", help="log file (default stdout)")
+    parser.add_argument("--search", choices=SEARCH_MODES, default="dijkstra")
+    parser.add_argument("--planner", choices=PLANNERS, default="prioritized")
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="reuse the parsed map cached next to the map file",
+    )
+    parser.add_argument(
+        "--plan-cache", action="store_true",
+        help="reuse plans solved earlier with the same map and options",
+    )
+    parser.add_argument(
+        "--stats", metavar="FILE",
+        help="write planner counters and phase timings as JSON "
+        "('-' for stderr)",
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE",
+        help="run the solve under cProfile and dump its stats to FILE",
+    )
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="check the plan against every map rule before writing it",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="do not report timings on stderr",
+    )
+    args = parser.parse_args()
+
+    # phases are always timed; search counters only with --stats
+    stats = PlannerStats()
+    try:
+        with stats.phase("parse"):
+            if args.cache:
+                parsed_map = cached_map_parser(args.map)
+            else:
+                parsed_map = map_parser(args.map)
+    except ParsingError as e:
+        print(e, file=sys.stderr)
+        return 1
+    with stats.phase("graph"):
+        graph = Graph(parsed_map)
+        graph.compile()
+    pf = Pathfinder(
+        graph,
+        parsed_map.nb_drones,
+        search=args.search,
+        planner=args.planner,
+        stats=stats if args.stats else None,
+    )
+    plan_cache = PlanCache() if args.plan_cache else None
+
+    def solve() -> CompactPlan:
+        if plan_cache is not None:
+            return plan_cache.solve(pf)
+        return pf.solve_compact()
+
+    report = None
+    try:
+        with stats.phase("solve"):
+            if args.profile:
+                plan, report = profiled(solve, args.profile)
+            else:
+                plan = solve()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.verify:
+        # numpy is only needed here, so plain runs do not import it
+        from verifier import verify_plan
+
+        with stats.phase("verify"):
+            violations = verify_plan(graph, plan, parsed_map.nb_drones)
+        for violation in violations:
+            print(violation, file=sys.stderr)
+        if violations:
+            return 1
+
+    # buffered writer, also on stdout, which is line-buffered on a tty
+    if args.output:
+        out = open(args.output, "w", buffering=BUFFER_SIZE)
+    else:
+        out = open(
+            sys.stdout.fileno(), "w", buffering=BUFFER_SIZE, closefd=False
+        )
+    with out, stats.phase("emit"):
+        turns = SimulationEngine(graph, plan).write(out)
+
+    if report is not None and not args.quiet:
+        print(report, file=sys.stderr)
+    if args.stats:
+        data = {
+            "map": args.map,
+            "search": args.search,
+            "planner": args.planner,
+            "nb_drones": parsed_map.nb_drones,
+            "turns": turns,
+            "plan_cache_hit": plan_cache is not None and plan_cache.hits > 0,
+            **stats.to_dict(),
+        }
+        text = json.dumps(data, indent=2)
+        if args.stats == "-":
+            print(text, file=sys.stderr)
+        else:
+            with open(args.stats, "w") as f:
+                f.write(text + "\n")
+    if not args.quiet:
+        cached = ""
+        if plan_cache is not None:
+            cached = " (plan cache hit)" if plan_cache.hits else " (miss)"
+        phases = stats.phases
+        verified = ""
+        if "verify" in phases:
+            verified = f"verify {phases['verify']:.3f}s, "
+        print(
+            f"parse {phases['parse']:.3f}s, graph {phases['graph']:.3f}s, "
+            f"solve {phases['solve']:.3f}s{cached}, "
+            f"emit {phases['emit']:.3f}s, {verified}"
+            f"{turns} turns, {parsed_map.nb_drones} drones",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
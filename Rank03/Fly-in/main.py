@@ -5,43 +5,49 @@ import sys
 # silence pygame prompt
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
+import numpy as np  # noqa: E402
+import numpy.typing as npt  # noqa: E402
 import pygame  # noqa: E402
 from parser import map_parser, ParsingError  # noqa: E402
 from graph import Graph  # noqa: E402
 from pathfinder import Pathfinder  # noqa: E402
-from simulation import SimulationEngine  # noqa: E402
+from plan_cache import PlanCache  # noqa: E402
+from replay import Replay  # noqa: E402
 from visualizer import Visualizer  # noqa: E402
 
+# turns skipped by [PGUP] and [PGDN]
+SEEK_STEP = 10
 
-def get_drone_pixel_pos(
-    viz: Visualizer, graph: Graph, state_str: str
-) -> tuple[float, float]:
-    """Converts a drone's state string to screen pixel coordinates.
+
+def state_table(
+    viz: Visualizer, graph: Graph, replay: Replay
+) -> npt.NDArray[np.float64]:
+    """Computes the layout pixel position of every drone state code.
+
+    Layout pixels are screen pixels before the visualizer's camera is
+    applied, so the table only changes on resize. A drone crossing a
+    connection is drawn at its midpoint.
 
     Args:
         viz: Visualizer instance.
         graph: Network Graph instance.
-        state_str: Node name or connection 'zoneA-zoneB' string.
+        replay: Replay whose state codes are looked up.
 
     Returns:
-        Tuple of (x, y) pixel coordinates.
+        Array of shape (number of codes, 2), indexed by state code.
     """
-    # if state is "zoneA-zoneB", drone is in transit (draw at midpoint)
-    if "-" in state_str:
-        z1_name, z2_name = state_str.split("-")
-        z1 = graph.get_zone(z1_name)
-        z2 = graph.get_zone(z2_name)
-        if z1 and z2:
-            p1 = viz.zone_to_pixel(z1)
-            p2 = viz.zone_to_pixel(z2)
-            return ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
-
-    # otherwise drone is resting at a single zone node
-    zone = graph.get_zone(state_str)
-    if zone:
-        px, py = viz.zone_to_pixel(zone)
-        return float(px), float(py)
-    return 0.0, 0.0
+    zones = np.array(
+        [
+            viz.zone_to_layout(zone)
+            for zone in (graph.zones[name] for name in replay.names)
+        ],
+        dtype=np.float64,
+    ).reshape(replay.nb_zones, 2)
+    u = np.frombuffer(replay.edge_u, dtype=np.int32)
+    v = np.frombuffer(replay.edge_v, dtype=np.int32)
+    midpoints = (zones[u] + zones[v]) / 2
+    # both directions of a connection share its midpoint
+    return np.concatenate([zones, np.repeat(midpoints, 2, axis=0)])
 
 
 def smoothstep(t: float) -> float:
@@ -56,33 +62,52 @@ def smoothstep(t: float) -> float:
     return t * t * (3.0 - 2.0 * t)
 
 
-def run_simulation(
-    graph: Graph,
-    paths: list[list[tuple[int, str]]],
-    nb_drones: int,
-    viz: Visualizer,
-) -> None:
+def run_simulation(graph: Graph, replay: Replay, viz: Visualizer) -> None:
     """Handles pygame event loop, animation, and rendering.
 
+    Any turn can be shown at any time, since the replay holds the state
+    of every turn: SPACE and BACKSPACE step one turn with an animation,
+    HOME, END, PGUP, PGDN and the timeline jump straight to a turn.
+
     Args:
         graph: Network Graph instance.
-        paths: List of calculated paths for each drone.
-        nb_drones: Total number of drones.
+        replay: Precomputed states of every turn.
         viz: Visualizer instance.
     """
-    engine = SimulationEngine(graph, paths)
-    sim_gen = engine.run()
-
-    max_turns = engine.max_turn
+    max_turns = replay.max_turn
+    # turn shown, and the turn the drones are sliding from
     current_turn = 0
-
-    # all drones start at the starting hub
-    start_name = graph.start_zone.name
-    prev_state = {f"D{i + 1}": start_name for i in range(nb_drones)}
-    target_state = dict(prev_state)
+    prev_turn = 0
+    print(f"\n--- SIMULATION START ({max_turns} turns) ---")
+    print()
+
+    # sprites in drone order, drawn at positions looked up per turn
+    drone_ids = [f"D{i + 1}" for i in range(replay.nb_drones)]
+    sprites = [viz.drone_sprite(drone_id) for drone_id in drone_ids]
+    surfaces = [surf for surf, _ in sprites]
+    anchors = np.array(
+        [anchor for _, anchor in sprites], dtype=np.int64
+    ).reshape(replay.nb_drones, 2)
+
+    # layout position of every state; refreshed on resize, not per frame
+    table = state_table(viz, graph, replay)
+    old_pos = table[replay.state(current_turn)]
+    new_pos = old_pos
 
     anim_progress = 1.0
     anim_speed = 0.05  # animation step per frame (~20 frames total)
+    # whether the timeline knob is being dragged
+    scrubbing = False
+
+    def seek(turn: int, animate: bool) -> None:
+        """Shows another turn, sliding the drones there if animate."""
+        nonlocal current_turn, prev_turn, old_pos, new_pos, anim_progress
+        turn = min(max(turn, 0), max_turns)
+        prev_turn = current_turn if animate else turn
+        current_turn = turn
+        old_pos = table[replay.state(prev_turn)]
+        new_pos = table[replay.state(current_turn)]
+        anim_progress = 0.0 if animate else 1.0
 
     clock = pygame.time.Clock()
     running = True
@@ -90,6 +115,27 @@ def run_simulation(
     while running:
         # process user input events
         for event in pygame.event.get():
+            # timeline clicks and drags seek before the camera sees them
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                turn = viz.timeline_turn(event.pos, max_turns)
+                if turn is not None:
+                    scrubbing = True
+                    seek(turn, animate=False)
+                    continue
+            if scrubbing:
+                if event.type == pygame.MOUSEMOTION:
+                    turn = viz.timeline_turn(event.pos, max_turns, True)
+                    if turn is not None:
+                        seek(turn, animate=False)
+                    continue
+                if event.type == pygame.MOUSEBUTTONUP:
+                    scrubbing = False
+                    continue
+
+            if viz.handle_event(event):
+                # camera moves only change the view, not the positions
+                continue
+
             if event.type == pygame.QUIT:
                 pygame.quit()
                 print("\n--- SIMULATION FINISHED ---")
@@ -104,13 +150,24 @@ def run_simulation(
                 elif event.key == pygame.K_SPACE:
                     # advance once previous animation is complete
                     if anim_progress >= 1.0 and current_turn < max_turns:
-                        try:
-                            prev_state = dict(target_state)
-                            target_state = next(sim_gen)
-                            anim_progress = 0.0
-                            current_turn += 1
-                        except StopIteration:
-                            pass
+                        seek(current_turn + 1, animate=True)
+                        line = replay.turn_line(current_turn)
+                        if line is not None:
+                            print(line)
+
+                elif event.key == pygame.K_BACKSPACE:
+                    # step back once previous animation is complete
+                    if anim_progress >= 1.0 and current_turn > 0:
+                        seek(current_turn - 1, animate=True)
+
+                elif event.key == pygame.K_HOME:
+                    seek(0, animate=False)
+                elif event.key == pygame.K_END:
+                    seek(max_turns, animate=False)
+                elif event.key == pygame.K_PAGEUP:
+                    seek(current_turn - SEEK_STEP, animate=False)
+                elif event.key == pygame.K_PAGEDOWN:
+                    seek(current_turn + SEEK_STEP, animate=False)
 
                 elif event.key == pygame.K_r:
                     # restart simulation
@@ -118,6 +175,10 @@ def run_simulation(
 
             elif event.type == pygame.VIDEORESIZE:
                 viz.recalculate_on_resize(event.w, event.h)
+                # the animation keeps its progress on the new layout
+                table = state_table(viz, graph, replay)
+                old_pos = table[replay.state(prev_turn)]
+                new_pos = table[replay.state(current_turn)]
 
         # advance animation progress
         if anim_progress < 1.0:
@@ -130,21 +191,12 @@ def run_simulation(
         # render background, nodes, and connections
         viz.draw_background()
 
-        # interpolate drone positions smoothly between turns
-        for drone_id in target_state:
-            old_pos = get_drone_pixel_pos(
-                viz, graph, prev_state.get(drone_id, start_name)
-            )
-            new_pos = get_drone_pixel_pos(
-                viz, graph, target_state.get(drone_id, start_name)
-            )
-
-            current_x = old_pos[0] + (new_pos[0] - old_pos[0]) * smooth_t
-            current_y = old_pos[1] + (new_pos[1] - old_pos[1]) * smooth_t
-
-            viz.draw_drone(drone_id, (current_x, current_y))
+        # interpolate every drone at once between turns
+        current = old_pos + (new_pos - old_pos) * smooth_t
+        viz.draw_drone_layer(surfaces, current, anchors)
 
         viz.draw_turn_counter(current_turn, max_turns)
+        viz.draw_timeline(current_turn, max_turns)
         viz.draw_legend()
 
         pygame.display.flip()
@@ -165,20 +217,23 @@ def main() -> None:
     # step 2: construct graph
     graph = Graph(parsed_map)
 
-    # step 3: calculate collision-free paths
+    # step 3: calculate collision-free paths, or reuse the cached plan
     pf = Pathfinder(graph, parsed_map.nb_drones)
     try:
-        paths = pf.solve()
+        plan = PlanCache().solve(pf)
     except ValueError as e:
         print(e)
         return
 
-    # step 4: initialize pygame visualizer
+    # step 4: precompute every turn's state for seeking
+    replay = Replay(graph, plan)
+
+    # step 5: initialize pygame visualizer
     viz = Visualizer(graph)
 
-    # step 5: run simulation loop (pressing R restarts loop)
+    # step 6: run simulation loop (pressing R restarts loop)
     while True:
-        run_simulation(graph, paths, parsed_map.nb_drones, viz)
+        run_simulation(graph, replay, viz)
         print("\n--- RESTARTING SIMULATION ---\n")
 
 
@@ -0,0 +1,250 @@
+# map_cache.py - binary cache of parsed maps, stored next to the map file
+import gc
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from data import MapStructure, Zone, Connection
+from parser import map_parser, PARSER_VERSION
+
+# suffix appended to the map path to name its cache file
+CACHE_SUFFIX = ".flycache"
+# bumped whenever the layout below changes
+FORMAT_VERSION = 1
+MAGIC = b"FLYC"
+# magic, format and parser versions, sha256 of the map, nb_drones,
+# zone and connection counts, start and end zone indices, blob sizes
+HEADER = struct.Struct("<4sHH32sqqqqqqq")
+ZONE_TYPES = ("normal", "blocked", "restricted", "priority")
+
+
+def cache_path(filepath: str) -> str:
+    """Returns the path of the cache file of a map."""
+    return filepath + CACHE_SUFFIX
+
+
+def map_digest(data: bytes) -> bytes:
+    """Hashes the raw content of a map file.
+
+    Args:
+        data: Bytes of the map file.
+
+    Returns:
+        The 32-byte sha256 digest keying the cache.
+    """
+    return hashlib.sha256(data).digest()
+
+
+def to_little_endian(a: "array[int]") -> bytes:
+    """Returns the bytes of an array in little-endian order."""
+    if sys.byteorder == "big":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def read_little_endian(
+    typecode: str, buf: memoryview, offset: int, count: int
+) -> tuple["array[int]", int]:
+    """Reads `count` little-endian items of a typed array from a buffer.
+
+    Args:
+        typecode: array typecode of the items.
+        buf: Whole cache file content.
+        offset: Byte offset of the first item.
+        count: Number of items.
+
+    Returns:
+        The array and the offset just past it.
+    """
+    a = array(typecode)
+    end = offset + count * a.itemsize
+    if end > len(buf):
+        raise ValueError("truncated cache")
+    a.frombytes(buf[offset:end])
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a, end
+
+
+def encode(parsed_map: MapStructure, digest: bytes) -> bytes:
+    """Serializes a validated map into the cache format.
+
+    Zones keep their file order. Names and colors are newline-joined
+    blobs, since neither can contain whitespace, and every numeric field
+    is a flat little-endian array.
+
+    Args:
+        parsed_map: Map returned by the parser.
+        digest: Hash of the map file the map was parsed from.
+
+    Returns:
+        The cache file content.
+    """
+    zones = list(parsed_map.zones.values())
+    index = {zone.name: i for i, zone in enumerate(zones)}
+    start = parsed_map.start_hub
+    end = parsed_map.end_hub
+    names = "\n".join(zone.name for zone in zones).encode()
+    # an empty color means none: metadata values are never empty
+    colors = "\n".join(zone.color or "" for zone in zones).encode()
+    connections = parsed_map.connections
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        PARSER_VERSION,
+        digest,
+        parsed_map.nb_drones,
+        len(zones),
+        len(connections),
+        index[start.name] if start is not None else -1,
+        index[end.name] if end is not None else -1,
+        len(names),
+        len(colors),
+    )
+    parts = [
+        header,
+        to_little_endian(array("q", (zone.x for zone in zones))),
+        to_little_endian(array("q", (zone.y for zone in zones))),
+        to_little_endian(array("q", (zone.max_drones for zone in zones))),
+        to_little_endian(
+            array("b", (ZONE_TYPES.index(z.zone_type) for z in zones))
+        ),
+        to_little_endian(array("i", (index[c.zone1] for c in connections))),
+        to_little_endian(array("i", (index[c.zone2] for c in connections))),
+        to_little_endian(
+            array("q", (c.max_link_capacity for c in connections))
+        ),
+        names,
+        colors,
+    ]
+    return b"".join(parts)
+
+
+def decode(content: bytes, digest: bytes) -> MapStructure | None:
+    """Rebuilds a map from cache content if its key matches.
+
+    Args:
+        content: The cache file content.
+        digest: Hash of the current map file.
+
+    Returns:
+        The cached map, or None if the cache is stale, was written by
+        another parser or format version, or is damaged.
+    """
+    if len(content) < HEADER.size:
+        return None
+    (
+        magic, format_version, parser_version, cached_digest, nb_drones,
+        nb_zones, nb_connections, start, end, names_size, colors_size,
+    ) = HEADER.unpack_from(content)
+    if (
+        magic != MAGIC
+        or format_version != FORMAT_VERSION
+        or parser_version != PARSER_VERSION
+        or cached_digest != digest
+    ):
+        return None
+
+    buf = memoryview(content)
+    try:
+        offset = HEADER.size
+        xs, offset = read_little_endian("q", buf, offset, nb_zones)
+        ys, offset = read_little_endian("q", buf, offset, nb_zones)
+        capacities, offset = read_little_endian("q", buf, offset, nb_zones)
+        types, offset = read_little_endian("b", buf, offset, nb_zones)
+        zone1, offset = read_little_endian("i", buf, offset, nb_connections)
+        zone2, offset = read_little_endian("i", buf, offset, nb_connections)
+        links, offset = read_little_endian("q", buf, offset, nb_connections)
+        if offset + names_size + colors_size != len(buf):
+            return None
+        names = bytes(buf[offset:offset + names_size]).decode().split("\n")
+        offset += names_size
+        colors = bytes(buf[offset:]).decode().split("\n")
+        if len(names) != nb_zones or len(colors) != nb_zones:
+            return None
+
+        parsed_map = MapStructure(nb_drones=nb_drones)
+        # millions of acyclic objects would trigger full collections
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            zones = [
+                Zone(name, x, y, ZONE_TYPES[kind], capacity, color or None)
+                for name, x, y, kind, capacity, color in zip(
+                    names, xs, ys, types, capacities, colors
+                )
+            ]
+            parsed_map.zones = {zone.name: zone for zone in zones}
+            parsed_map.start_hub = zones[start] if start >= 0 else None
+            parsed_map.end_hub = zones[end] if end >= 0 else None
+            parsed_map.connections = [
+                Connection(names[a], names[b], capacity)
+                for a, b, capacity in zip(zone1, zone2, links)
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+    return parsed_map
+
+
+def write_cache(path: str, content: bytes) -> None:
+    """Writes a cache file atomically, ignoring unwritable locations.
+
+    Args:
+        path: Cache file path.
+        content: Encoded map.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        # a read-only map directory only costs the speed-up
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def cached_map_parser(filepath: str) -> MapStructure:
+    """Parses a map file, going through its binary cache when valid.
+
+    The cache next to the map is keyed by the map's sha256 and the
+    parser version. On a hit the map is rebuilt from one read of the
+    cache file; on a miss the file is fully parsed and validated and the
+    cache is rewritten. Invalid maps are never cached, so errors are the
+    same as with map_parser().
+
+    Args:
+        filepath: Path to the map file.
+
+    Returns:
+        The parsed MapStructure.
+
+    Raises:
+        ParsingError: If the map file is missing or invalid.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            digest = map_digest(f.read())
+    except OSError:
+        # let the parser report the missing or unreadable file
+        return map_parser(filepath)
+
+    path = cache_path(filepath)
+    try:
+        with open(path, "rb") as f:
+            cached = decode(f.read(), digest)
+    except OSError:
+        cached = None
+    if cached is not None:
+        return cached
+
+    parsed_map = map_parser(filepath)
+    write_cache(path, encode(parsed_map, digest))
+    return parsed_map
@@ -0,0 +1,317 @@
+# mapgen.py - synthetic map generator for benchmarks and stress tests
+import argparse
+import math
+import random
+from typing import Callable
+
+# one zone line: (prefix, name, x, y, metadata)
+ZoneLine = tuple[str, str, int, int, str]
+# one connection line: (zone1, zone2, metadata)
+ConnectionLine = tuple[str, str, str]
+
+
+def format_map(
+    nb_drones: int,
+    zones: list[ZoneLine],
+    connections: list[ConnectionLine],
+    comment: str,
+) -> str:
+    """Renders zones and connections in the map file format.
+
+    Args:
+        nb_drones: Number of drones to fly.
+        zones: Zone lines, start and end hubs included.
+        connections: Connection lines.
+        comment: Text of the leading comment line.
+
+    Returns:
+        The map file content.
+    """
+    lines = [f"# {comment}", "", f"nb_drones: {nb_drones}", ""]
+    for prefix, name, x, y, meta in zones:
+        suffix = f" [{meta}]" if meta else ""
+        lines.append(f"{prefix}: {name} {x} {y}{suffix}")
+    lines.append("")
+    for z1, z2, meta in connections:
+        suffix = f" [{meta}]" if meta else ""
+        lines.append(f"connection: {z1}-{z2}{suffix}")
+    return "\n".join(lines) + "\n"
+
+
+def _zone_meta(rng: random.Random, max_capacity: int, safe: bool) -> str:
+    """Draws a random zone type and capacity.
+
+    Args:
+        rng: Random source.
+        max_capacity: Largest `max_drones` value to draw.
+        safe: True for zones that must stay passable (never blocked).
+
+    Returns:
+        Metadata block content for a hub line.
+    """
+    roll = rng.random()
+    if roll < 0.05 and not safe:
+        return "zone=blocked"
+    capacity = rng.randint(1, max_capacity)
+    if roll < 0.15:
+        return f"zone=restricted max_drones={capacity}"
+    if roll < 0.25:
+        return f"zone=priority max_drones={capacity}"
+    return f"max_drones={capacity}"
+
+
+def grid_map(nb_zones: int, nb_drones: int, seed: int) -> str:
+    """Builds a square 4-connected grid with mixed zone types.
+
+    The first row and last column are never blocked, so the end hub in
+    the far corner is always reachable.
+
+    Args:
+        nb_zones: Approximate number of zones.
+        nb_drones: Number of drones.
+        seed: Random seed.
+
+    Returns:
+        The map file content.
+    """
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(nb_zones))
+    zones: list[ZoneLine] = []
+    connections: list[ConnectionLine] = []
+    for y in range(side):
+        for x in range(side):
+            name = f"g{x}_{y}"
+            if (x, y) == (0, 0):
+                zones.append(("start_hub", name, x, y, ""))
+            elif (x, y) == (side - 1, side - 1):
+                zones.append(("end_hub", name, x, y, ""))
+            else:
+                safe = y == 0 or x == side - 1
+                zones.append(("hub", name, x, y, _zone_meta(rng, 3, safe)))
+            if x > 0:
+                connections.append((f"g{x - 1}_{y}", name, ""))
+            if y > 0:
+                connections.append((f"g{x}_{y - 1}", name, ""))
+    return format_map(
+        nb_drones, zones, connections, f"grid {side}x{side}, seed {seed}"
+    )
+
+
+def geometric_map(nb_zones: int, nb_drones: int, seed: int) -> str:
+    """Builds a random geometric graph on a square of integer points.
+
+    Zones closer than a radius chosen for an average degree of about six
+    are linked; consecutive zones in x order are linked as well, so the
+    graph is always connected. The start hub is the leftmost zone and the
+    end hub the rightmost one.
+
+    Args:
+        nb_zones: Number of zones.
+        nb_drones: Number of drones.
+        seed: Random seed.
+
+    Returns:
+        The map file content.
+    """
+    rng = random.Random(seed)
+    n = max(2, nb_zones)
+    side = max(4, 4 * math.isqrt(n))
+    cells = rng.sample(range(side * side), n)
+    points = sorted((c % side, c // side) for c in cells)
+    radius = side * math.sqrt(6.0 / (math.pi * n))
+
+    zones: list[ZoneLine] = []
+    for i, (x, y) in enumerate(points):
+        if i == 0:
+            zones.append(("start_hub", f"p{i}", x, y, ""))
+        elif i == n - 1:
+            zones.append(("end_hub", f"p{i}", x, y, ""))
+        else:
+            # no blocked zones: one could cut the x-order chain
+            zones.append(("hub", f"p{i}", x, y, _zone_meta(rng, 3, True)))
+
+    # bucket points by radius-sized cells to find close pairs
+    size = max(radius, 1.0)
+    buckets: dict[tuple[int, int], list[int]] = {}
+    for i, (x, y) in enumerate(points):
+        buckets.setdefault((int(x / size), int(y / size)), []).append(i)
+    pairs: set[tuple[int, int]] = {(i, i + 1) for i in range(n - 1)}
+    for (bx, by), members in buckets.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in buckets.get((bx + dx, by + dy), []):
+                    for i in members:
+                        if i < j and math.dist(
+                            points[i], points[j]
+                        ) <= radius:
+                            pairs.add((i, j))
+
+    connections: list[ConnectionLine] = [
+        (f"p{i}", f"p{j}", f"max_link_capacity={rng.randint(1, 2)}")
+        for i, j in sorted(pairs)
+    ]
+    return format_map(
+        nb_drones, zones, connections, f"geometric {n} zones, seed {seed}"
+    )
+
+
+def corridor_map(nb_zones: int, nb_drones: int, seed: int) -> str:
+    """Builds one long single-file corridor with passing bays.
+
+    Every fifth corridor zone has a side bay with room for several
+    drones, and every seventh one is restricted.
+
+    Args:
+        nb_zones: Approximate number of zones.
+        nb_drones: Number of drones.
+        seed: Random seed.
+
+    Returns:
+        The map file content.
+    """
+    rng = random.Random(seed)
+    length = max(2, nb_zones * 5 // 6)
+    zones: list[ZoneLine] = [("start_hub", "c0", 0, 0, "")]
+    connections: list[ConnectionLine] = []
+    for i in range(1, length):
+        name = f"c{i}"
+        if i == length - 1:
+            zones.append(("end_hub", name, i, 0, ""))
+        else:
+            restricted = "zone=restricted " if i % 7 == 0 else ""
+            zones.append(
+                ("hub", name, i, 0,
+                 f"{restricted}max_drones={rng.randint(1, 2)}")
+            )
+            if i % 5 == 0:
+                zones.append(
+                    ("hub", f"bay{i}", i, 1,
+                     f"zone=priority max_drones={rng.randint(2, 4)}")
+                )
+                connections.append((name, f"bay{i}", ""))
+        connections.append((f"c{i - 1}", name, ""))
+    return format_map(
+        nb_drones, zones, connections, f"corridor {length}, seed {seed}"
+    )
+
+
+def bottleneck_map(nb_zones: int, nb_drones: int, seed: int) -> str:
+    """Builds two grids joined by a narrow neck of restricted zones.
+
+    Args:
+        nb_zones: Approximate number of zones.
+        nb_drones: Number of drones.
+        seed: Random seed.
+
+    Returns:
+        The map file content.
+    """
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(max(nb_zones // 2, 4)))
+    neck = max(2, side // 2)
+    zones: list[ZoneLine] = []
+    connections: list[ConnectionLine] = []
+    for part, x0 in (("l", 0), ("r", side + neck)):
+        for y in range(side):
+            for x in range(side):
+                name = f"{part}{x}_{y}"
+                if part == "l" and (x, y) == (0, 0):
+                    zones.append(("start_hub", name, x0 + x, y, ""))
+                elif part == "r" and (x, y) == (side - 1, side - 1):
+                    zones.append(("end_hub", name, x0 + x, y, ""))
+                else:
+                    meta = f"max_drones={rng.randint(2, 4)}"
+                    zones.append(("hub", name, x0 + x, y, meta))
+                if x > 0:
+                    connections.append((f"{part}{x - 1}_{y}", name, ""))
+                if y > 0:
+                    connections.append((f"{part}{x}_{y - 1}", name, ""))
+
+    # neck runs from the middle of the left grid's east edge
+    mid = side // 2
+    previous = f"l{side - 1}_{mid}"
+    for i in range(neck):
+        name = f"n{i}"
+        zones.append(
+            ("hub", name, side + i, mid, "zone=restricted max_drones=1")
+        )
+        connections.append((previous, name, "max_link_capacity=1"))
+        previous = name
+    connections.append((previous, f"r0_{mid}", "max_link_capacity=1"))
+    return format_map(
+        nb_drones, zones, connections,
+        f"bottleneck {side}x{side} grids, neck {neck}, seed {seed}",
+    )
+
+
+def hubs_map(nb_zones: int, nb_drones: int, seed: int) -> str:
+    """Builds layers of high-capacity hubs, fully linked layer to layer.
+
+    Args:
+        nb_zones: Approximate number of zones.
+        nb_drones: Number of drones.
+        seed: Random seed.
+
+    Returns:
+        The map file content.
+    """
+    rng = random.Random(seed)
+    width = max(1, math.isqrt(max(nb_zones, 1)) // 2)
+    depth = max(1, (nb_zones - 2) // width)
+    zones: list[ZoneLine] = [("start_hub", "start", 0, 0, "")]
+    connections: list[ConnectionLine] = []
+    previous = ["start"]
+    for layer in range(depth):
+        current = []
+        for k in range(width):
+            name = f"h{layer}_{k}"
+            zone = "zone=priority " if rng.random() < 0.1 else ""
+            zones.append(
+                ("hub", name, layer + 1, k,
+                 f"{zone}max_drones={rng.randint(10, 50)}")
+            )
+            current.append(name)
+            for prev in previous:
+                connections.append(
+                    (prev, name,
+                     f"max_link_capacity={rng.randint(5, 20)}")
+                )
+        previous = current
+    zones.append(("end_hub", "goal", depth + 1, 0, ""))
+    for prev in previous:
+        connections.append((prev, "goal", "max_link_capacity=20"))
+    return format_map(
+        nb_drones, zones, connections,
+        f"hubs {depth}x{width}, seed {seed}",
+    )
+
+
+GENERATORS: dict[str, Callable[[int, int, int], str]] = {
+    "grid": grid_map,
+    "geometric": geometric_map,
+    "corridor": corridor_map,
+    "bottleneck": bottleneck_map,
+    "hubs": hubs_map,
+}
+
+
+def main() -> None:
+    """Writes one generated map to a file or stdout."""
+    parser = argparse.ArgumentParser(description="Generate a Fly-in map.")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("--zones", type=int, default=100)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="output file (default stdout)")
+    args = parser.parse_args()
+
+    text = GENERATORS[args.kind](args.zones, args.drones, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,28 @@
 # parser.py - reads and validates the map input file
+import gc
 import re
 from data import MapStructure, Zone, Connection
 
+# bumped whenever parsing or validation changes, invalidating map caches
+PARSER_VERSION = 1
+# characters of file read per batch of lines
+CHUNK_SIZE = 1 << 20
+
+METADATA = re.compile(r" \[([^\[\]]*)\]$")
+# well-formed zone and connection lines; anything else takes the slow
+# path, which reports the exact error
+ZONE_LINE = re.compile(
+    r"(start_hub:|end_hub:|hub:) ([^\s\[\]-]+) (-?[0-9]+) (-?[0-9]+)"
+    r"(?: \[([^\[\]]*)\])?"
+)
+CONNECTION_LINE = re.compile(
+    r"connection: ([^\s\[\]-]+)-([^\s\[\]-]+)"
+    r"(?: \[max_link_capacity=([0-9]+)\])?"
+)
+ZONE_KEYS = frozenset({"zone", "max_drones", "color"})
+CONNECTION_KEYS = frozenset({"max_link_capacity"})
+ZONE_TYPES = frozenset({"normal", "blocked", "restricted", "priority"})
+
 
 class ParsingError(Exception):
     """Custom exception raised for map parsing and validation errors."""
@@ -18,8 +39,9 @@ class MapParser:
         # state trackers to enforce ordering: drones -> zones -> connections
         self.parsed_drones = False
         self.connections_started = False
-        # frozenset to detect duplicate connections like A-B and B-A
-        self.seen_connections: set[frozenset[str]] = set()
+        # connections keyed by their sorted zone pair, so A-B and B-A
+        # collide; Connection objects are only built once parsing ends
+        self.links: dict[tuple[str, str], tuple[str, str, int]] = {}
 
     def _parse_metadata(self, line: str) -> dict[str, str]:
         """Extracts key=value pairs from the [...] metadata block.
@@ -30,7 +52,7 @@ class MapParser:
         Returns:
             Dictionary of parsed key-value metadata pairs.
         """
-        result = re.search(r" \[([^\[\]]*)\]$", line)
+        result = METADATA.search(line)
         if not result:
             return {}  # metadata is optional
 
@@ -101,7 +123,7 @@ class MapParser:
             )
 
         # strip out the metadata block to parse core elements
-        core_line = re.sub(r" \[([^\[\]]*)\]$", "", line).strip()
+        core_line = METADATA.sub("", line).strip()
         core_parts = core_line.split()
 
         if len(core_parts) != 4:
@@ -141,9 +163,8 @@ class MapParser:
             )
 
         metadata = self._parse_metadata(line)
-        allowed_zone_keys = {"zone", "max_drones", "color"}
         for k in metadata:
-            if k not in allowed_zone_keys:
+            if k not in ZONE_KEYS:
                 raise ParsingError(
                     f"[Line {self.line_num}] Error: "
                     f"Unknown metadata key '{k}' for a zone."
@@ -155,7 +176,7 @@ class MapParser:
             metadata.pop("max_drones", None)
 
         z_type = metadata.get("zone", "normal")
-        if z_type not in ["normal", "blocked", "restricted", "priority"]:
+        if z_type not in ZONE_TYPES:
             raise ParsingError(
                 f"[Line {self.line_num}] Error: "
                 f"Invalid zone type '{z_type}'."
@@ -206,7 +227,7 @@ class MapParser:
         """
         self.connections_started = True
 
-        core_line = re.sub(r" \[([^\[\]]*)\]$", "", line).strip()
+        core_line = METADATA.sub("", line).strip()
         core_parts = core_line.split()
 
         if len(core_parts) != 2 or core_parts[0] != "connection:":
@@ -238,19 +259,17 @@ class MapParser:
                 "Connection refers to an undefined zone."
             )
 
-        # frozenset treats A-B and B-A as the exact same connection
-        connection_pair = frozenset({zone1, zone2})
-        if connection_pair in self.seen_connections:
+        # the sorted pair treats A-B and B-A as the exact same connection
+        key = (zone1, zone2) if zone1 < zone2 else (zone2, zone1)
+        if key in self.links:
             raise ParsingError(
                 f"[Line {self.line_num}] Error: "
                 f"Duplicate connection '{zone1}-{zone2}'."
             )
-        self.seen_connections.add(connection_pair)
 
         metadata = self._parse_metadata(line)
-        allowed_cnx_keys = {"max_link_capacity"}
         for k in metadata:
-            if k not in allowed_cnx_keys:
+            if k not in CONNECTION_KEYS:
                 raise ParsingError(
                     f"[Line {self.line_num}] Error: "
                     f"Unknown metadata key '{k}' for a connection."
@@ -266,7 +285,100 @@ class MapParser:
                 "'max_link_capacity' must be a positive integer."
             )
 
-        self.map.connections.append(Connection(zone1, zone2, max_link))
+        self.links[key] = (zone1, zone2, max_link)
+
+    def _fast_zone(self, line: str) -> bool:
+        """Adds a well-formed zone line without the per-line regex passes.
+
+        Nothing is changed unless every check passes, so a rejected line
+        can be handed to _parsed_hubs() for the exact error.
+
+        Args:
+            line: Stripped line starting with a zone prefix.
+
+        Returns:
+            True if the zone was added, False to take the slow path.
+        """
+        match = ZONE_LINE.fullmatch(line)
+        if match is None or self.connections_started:
+            return False
+        prefix, name, x_str, y_str, block = match.groups()
+        if name in self.map.zones:
+            return False
+        metadata: dict[str, str] = {}
+        if block:
+            for pair in block.split():
+                k, _, v = pair.partition("=")
+                if not k or not v or k in metadata or k not in ZONE_KEYS:
+                    return False
+                metadata[k] = v
+        is_hub = prefix != "hub:"
+        if is_hub:
+            metadata.pop("max_drones", None)
+        z_type = metadata.get("zone", "normal")
+        if z_type not in ZONE_TYPES or (is_hub and z_type == "blocked"):
+            return False
+        try:
+            x, y = int(x_str), int(y_str)
+            max_drones = int(metadata.get("max_drones", "1"))
+        except ValueError:
+            return False
+        if max_drones <= 0:
+            return False
+        if prefix == "start_hub:":
+            if self.map.start_hub is not None:
+                return False
+        elif prefix == "end_hub:" and self.map.end_hub is not None:
+            return False
+
+        new_zone = Zone(name, x, y, z_type, max_drones, metadata.get("color"))
+        self.map.zones[name] = new_zone
+        if prefix == "start_hub:":
+            self.map.start_hub = new_zone
+        elif prefix == "end_hub:":
+            self.map.end_hub = new_zone
+        return True
+
+    def _parse_line(self, line: str) -> None:
+        """Parses one stripped, comment-free, non-empty line.
+
+        Well-formed connection lines never get here: _read() handles
+        them inline, since they dominate large maps.
+
+        Args:
+            line: Line content.
+        """
+        if line.startswith(("start_hub:", "end_hub:", "hub:")):
+            if not self.parsed_drones or not self._fast_zone(line):
+                self._dispatch(line)
+        else:
+            self._dispatch(line)
+
+    def _dispatch(self, line: str) -> None:
+        """Parses one line through the per-line validators.
+
+        Args:
+            line: Stripped, comment-free, non-empty line.
+        """
+        # first non-empty line must be nb_drones
+        if not self.parsed_drones and not line.startswith("nb_drones:"):
+            raise ParsingError(
+                f"[Line {self.line_num}] Error: "
+                "'nb_drones:' must be the first line."
+            )
+
+        # dispatch line according to its prefix
+        if line.startswith("nb_drones:"):
+            self._parse_nb_drones(line)
+        elif line.startswith(("start_hub:", "end_hub:", "hub:")):
+            self._parsed_hubs(line)
+        elif line.startswith("connection:"):
+            self._parse_connections(line)
+        else:
+            raise ParsingError(
+                f"[Line {self.line_num}] Error: "
+                "Unrecognized line syntax."
+            )
 
     def parse(self, filepath: str) -> MapStructure:
         """Reads and parses a map file into a validated MapStructure.
@@ -277,45 +389,19 @@ class MapParser:
         Returns:
             The parsed and validated MapStructure object.
         """
+        # parsing allocates millions of acyclic objects on large maps,
+        # which would trigger full collections
+        gc_enabled = gc.isenabled()
+        gc.disable()
         try:
-            with open(filepath, "r") as f:
-                for line_num, line in enumerate(f, start=1):
-                    self.line_num = line_num
-                    line = line.strip()
-
-                    # ignore comments
-                    if "#" in line:
-                        line = line.split("#", 1)[0].strip()
-                    if not line:
-                        continue
-
-                    # first non-empty line must be nb_drones
-                    if (
-                        not self.parsed_drones
-                        and not line.startswith("nb_drones:")
-                    ):
-                        raise ParsingError(
-                            f"[Line {self.line_num}] Error: "
-                            "'nb_drones:' must be the first line."
-                        )
-
-                    # dispatch line according to its prefix
-                    if line.startswith("nb_drones:"):
-                        self._parse_nb_drones(line)
-                    elif line.startswith(("start_hub:", "end_hub:", "hub:")):
-                        self._parsed_hubs(line)
-                    elif line.startswith("connection:"):
-                        self._parse_connections(line)
-                    else:
-                        raise ParsingError(
-                            f"[Line {self.line_num}] Error: "
-                            "Unrecognized line syntax."
-                        )
-
-        except FileNotFoundError:
-            raise ParsingError(f"Error: Could not find map at '{filepath}'")
-        except PermissionError:
-            raise ParsingError(f"Error: Read permission denied '{filepath}'")
+            self._read(filepath)
+            self.map.connections = [
+                Connection(zone1, zone2, max_link)
+                for zone1, zone2, max_link in self.links.values()
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
 
         if not self.parsed_drones:
             raise ParsingError("Error: Map file empty or missing config.")
@@ -326,6 +412,62 @@ class MapParser:
             )
         return self.map
 
+    def _read(self, filepath: str) -> None:
+        """Feeds every line of a map file to the parser, in large batches.
+
+        Args:
+            filepath: Path to the input map file.
+        """
+        parse_line = self._parse_line
+        match_connection = CONNECTION_LINE.fullmatch
+        links = self.links
+        zones = self.map.zones
+        line_num = 0
+        try:
+            with open(filepath, "r") as f:
+                while True:
+                    lines = f.readlines(CHUNK_SIZE)
+                    if not lines:
+                        break
+                    for line in lines:
+                        line_num += 1
+                        line = line.strip()
+
+                        # ignore comments
+                        if "#" in line:
+                            line = line.split("#", 1)[0].strip()
+                        if not line:
+                            continue
+                        self.line_num = line_num
+
+                        # well-formed connection: one match, no state
+                        # changes unless every check passes, otherwise
+                        # the slow path reports the exact error
+                        match = match_connection(line)
+                        if match is not None and self.parsed_drones:
+                            zone1, zone2, capacity = match.groups()
+                            key = (
+                                (zone1, zone2) if zone1 < zone2
+                                else (zone2, zone1)
+                            )
+                            max_link = int(capacity) if capacity else 1
+                            if (
+                                zone1 != zone2
+                                and key not in links
+                                and zone1 in zones
+                                and zone2 in zones
+                                and max_link > 0
+                            ):
+                                self.connections_started = True
+                                links[key] = (zone1, zone2, max_link)
+                                continue
+                        parse_line(line)
+
+        except FileNotFoundError:
+            raise ParsingError(f"Error: Could not find map at '{filepath}'")
+        except PermissionError:
+            raise ParsingError(f"Error: Read permission denied '{filepath}'")
+
 
 def map_parser(filepath: str) -> MapStructure:
     """Convenience wrapper to parse a map file in one call.
@@ -1,230 +1,606 @@
 # pathfinder.py - finds the shortest path for each drone using dijkstra
 import heapq
-from collections import defaultdict
-from graph import Graph
+import time
+from array import array
+from typing import Callable
+from graph import Graph, CompiledGraph, ZONE_BLOCKED, ZONE_PRIORITY
+from reservations import ReservationTable
+from distances import DistanceField
+from plan import CompactPlan
+from sipp import SafeIntervalPlanner
+from cbs import CBSPlanner
+from flow import FlowPlanner
+from waves import WavePlanner
+from portfolio import PortfolioPlanner
+from stats import PlannerStats
+
+SEARCH_MODES = ("dijkstra", "astar", "sipp")
+PLANNERS = ("prioritized", "cbs", "flow", "waves", "portfolio")
+# bumped whenever planning changes the paths it returns, invalidating
+# plan caches
+PLANNER_VERSION = 1
 
 
 class Pathfinder:
-    """Plans collision-free paths for all drones using Dijkstra."""
-
-    def __init__(self, graph: Graph, nb_drones: int) -> None:
-        self.graph = graph
+    """Plans collision-free paths for all drones using Dijkstra.
+
+    Planning runs on the graph's compiled integer form: zones and links are
+    ids, and zone names only appear in the paths returned by solve().
+
+    `search` selects the single-drone search: "dijkstra" (default),
+    "astar", which orders the heap with a static reverse-Dijkstra distance
+    to the end hub and returns the same paths while expanding fewer states,
+    or "sipp", which searches over safe intervals so that waiting costs one
+    expansion instead of one state per turn.
+
+    In windowed mode, reservation rows older than the current drone's start
+    turn are released as planning advances, so memory follows the active
+    time window rather than the fleet size.
+
+    `planner` selects how the fleet is planned: "prioritized" (default)
+    plans drones one at a time in index order; "cbs" first does the same,
+    then spends up to `node_budget` constraint-tree nodes and
+    `time_budget` seconds looking for a plan with a shorter makespan;
+    "flow" routes the fleet on time-shifted copies of min-cost flow routes,
+    with no per-drone search; "waves" plans like "prioritized" but serves
+    drones from cached routes and only searches when none of them fit;
+    "portfolio" runs several stagger and ordering policies in parallel
+    worker processes within `time_budget` seconds and keeps the plan with
+    the smallest makespan.
+
+    `stagger` sets the start-turn divisor of prioritized planning (drone i
+    starts at turn i // stagger, 0 disables staggering).
+
+    Outside windowed mode the planned paths are kept in a CompactPlan,
+    so replan() can route drones around zones or links closed in the
+    middle of a run.
+
+    `stats`, when given, receives per-drone search counters, capacity
+    probes and reservation memory; only push and pop totals are kept
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        graph: Graph | CompiledGraph,
+        nb_drones: int,
+        windowed: bool = False,
+        search: str = "dijkstra",
+        planner: str = "prioritized",
+        node_budget: int = 2000,
+        time_budget: float = 10.0,
+        stagger: int = 2,
+        workers: int | None = None,
+        stats: PlannerStats | None = None,
+    ) -> None:
+        if search not in SEARCH_MODES:
+            raise ValueError(
+                f"unknown search mode '{search}', expected one of "
+                f"{', '.join(SEARCH_MODES)}."
+            )
+        if planner not in PLANNERS:
+            raise ValueError(
+                f"unknown planner '{planner}', expected one of "
+                f"{', '.join(PLANNERS)}."
+            )
+        self.graph: CompiledGraph = graph.compile()
         self.nb_drones = nb_drones
+        self.windowed = windowed
+        self.search = search
+        self.planner = planner
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.stagger = stagger
+        self.workers = workers
+        # number of states expanded by all searches so far
+        self.expanded = 0
+        # heap pushes and pops of all searches so far
+        self.pushes = 0
+        self.pops = 0
+        # detailed counters, only collected when given
+        self.stats = stats
+        # drones served from cached routes / by a fresh search ("waves")
+        self.cached_drones = 0
+        self.searched_drones = 0
+
+        # reservation table: dense per-turn booking counts for zones and
+        # links, indexed by zone id and edge id
+        self.reservations = ReservationTable(
+            self.graph.nb_zones,
+            self.graph.nb_edges,
+            limits=self.graph.capacity,
+        )
 
-        # reservation tables: track booked zones and links per turn
-        # zone_reservations[turn][zone_name] = count of booked drones
-        self.zone_reservations: dict[int, dict[str, int]] = defaultdict(
-            lambda: defaultdict(int)
+        # per-drone constraints set by CBS: forbidden `turn * nb_zones +
+        # zone` and `turn * nb_edges + edge` codes
+        self.forbidden_zones: frozenset[int] = frozenset()
+        self.forbidden_links: frozenset[int] = frozenset()
+
+        # paths of the last plan in compact form, kept for replan()
+        self.plan = CompactPlan(self.graph.names)
+        # first closed turn of each zone and link closed by replan()
+        self.zone_closed_at: dict[int, int] = {}
+        self.link_closed_at: dict[int, int] = {}
+        self._sipp = SafeIntervalPlanner(
+            self.graph,
+            self.reservations,
+            self.zone_closed_at,
+            self.link_closed_at,
+            stats,
         )
-        # link_reservations[turn][frozenset({A, B})] = count of transit drones
-        self.link_reservations: dict[
-            int, dict[frozenset[str], int]
-        ] = defaultdict(lambda: defaultdict(int))
+        # distance field repaired on each closure, created by replan()
+        self._distances: DistanceField | None = None
+        # zero heuristic with -1 on dead ends, built by the first search
+        self._zero_h: "array[int] | None" = None
 
-        # search horizon limit to avoid infinite loops if goal is unreachable
+        # hard cap on the adaptive per-drone search horizon
         self.max_search_turns = max(
-            500, len(self.graph.zones) * (self.nb_drones + 5) + 50
+            500, self.graph.nb_zones * (self.nb_drones + 5) + 50
         )
 
-    def _zone_is_free(self, zone_name: str, turn: int) -> bool:
+    def _zone_is_free(self, zone: int, turn: int) -> bool:
         """Checks if a zone has available capacity at a specific turn.
 
         Args:
-            zone_name: Name of the zone to check.
+            zone: Id of the zone to check.
             turn: Simulation turn number.
 
         Returns:
             True if zone can accept another drone, False otherwise.
         """
-        # start and end hubs have unlimited capacity per subject rules
-        if zone_name in (
-            self.graph.start_zone.name,
-            self.graph.end_zone.name,
+        if (
+            self.zone_closed_at
+            and turn >= self.zone_closed_at.get(zone, turn + 1)
         ):
+            return False
+        # start and end hubs have unlimited capacity per subject rules
+        if zone == self.graph.start or zone == self.graph.end:
             return True
-        zone = self.graph.get_zone(zone_name)
-        if zone is None or zone.zone_type == "blocked":
+        if self.graph.zone_type[zone] == ZONE_BLOCKED:
+            return False
+        if (
+            self.forbidden_zones
+            and turn * self.graph.nb_zones + zone in self.forbidden_zones
+        ):
             return False
-        booked = self.zone_reservations[turn][zone_name]
-        return booked < zone.max_drones
+        booked = self.reservations.zone_count(zone, turn)
+        return booked < self.graph.capacity[zone]
 
-    def _link_is_free(self, z1: str, z2: str, turn: int) -> bool:
+    def _link_is_free(self, edge: int, turn: int) -> bool:
         """Checks if a connection has available capacity at a specific turn.
 
         Args:
-            z1: Starting zone name.
-            z2: Destination zone name.
+            edge: Id of the connection to check.
             turn: Simulation turn number.
 
         Returns:
             True if the connection capacity allows traversal, False otherwise.
         """
-        # waiting in place doesn't use any connection
-        if z1 == z2:
-            return True
-        conn = self.graph.get_connection(z1, z2)
-        if conn is None:
+        if (
+            self.forbidden_links
+            and turn * self.graph.nb_edges + edge in self.forbidden_links
+        ):
             return False
-        link_key = frozenset({z1, z2})
-        booked = self.link_reservations[turn][link_key]
-        return booked < conn.max_link_capacity
+        if (
+            self.link_closed_at
+            and turn >= self.link_closed_at.get(edge, turn + 1)
+        ):
+            return False
+        booked = self.reservations.link_count(edge, turn)
+        return booked < self.graph.edge_capacity[edge]
+
+    def _probes(
+        self,
+    ) -> tuple[Callable[[int, int], bool], Callable[[int, int], bool]]:
+        """Returns the zone and link checks, counted when stats are on.
+
+        Returns:
+            (zone_is_free, link_is_free) callables.
+        """
+        if self.stats is None:
+            return self._zone_is_free, self._link_is_free
+        return (
+            self.stats.count_zone(self._zone_is_free),
+            self.stats.count_link(self._link_is_free),
+        )
+
+    def _end_search(self, pops: int, left: int, peak: int) -> None:
+        """Adds the heap work of a finished search to the counters.
+
+        Every entry pushed was either popped or is still on the heap.
+
+        Args:
+            pops: Entries popped by the search.
+            left: Entries still on the heap.
+            peak: Largest heap size seen, only tracked with stats.
+        """
+        self.pops += pops
+        self.pushes += pops + left
+        if self.stats is not None:
+            self.stats.observe_heap(peak)
 
     def _trace_path(
         self,
-        end_state: tuple[int, str],
-        start_state: tuple[int, str],
-        came_from: dict[tuple[int, str], tuple[int, str]],
-    ) -> list[tuple[int, str]]:
+        end_state: int,
+        start_state: int,
+        came_from: dict[int, int],
+    ) -> list[tuple[int, int]]:
         """Reconstructs the full path from goal back to start.
 
+        States are encoded as `turn * nb_zones + zone_id`.
+
         Args:
-            end_state: Final (turn, zone) reached at the goal.
-            start_state: Initial (turn, zone) where drone started.
+            end_state: Final state reached at the goal.
+            start_state: Initial state where drone started.
             came_from: Map of state transitions used for backtracking.
 
         Returns:
-            List of (turn, zone) steps forming the complete route.
+            List of (turn, zone_id) steps forming the complete route.
         """
-        path: list[tuple[int, str]] = []
+        n = self.graph.nb_zones
+        path: list[tuple[int, int]] = []
         current = end_state
         while current in came_from:
-            path.append(current)
+            path.append(divmod(current, n))
             current = came_from[current]
-        path.append(start_state)
+        path.append(divmod(start_state, n))
         path.reverse()
         return path
 
-    def _find_path(self, start_turn: int) -> list[tuple[int, str]]:
-        """Runs time-expanded Dijkstra for a single drone.
+    def _heuristic(self) -> "array[int]":
+        """Returns the per-zone lower bound used to order the search.
+
+        Dijkstra uses zeros; A* uses the cached static distance to the end
+        hub. Both mark zones that can never reach it with -1, so dead ends
+        are never entered. Once zones or links are closed, every mode uses
+        the repaired distance field.
+
+        Returns:
+            Array of heuristic values indexed by zone id.
+        """
+        dist = self._static_distances()
+        if self._distances is not None or self.search in ("astar", "sipp"):
+            return dist
+        if self._zero_h is None:
+            self._zero_h = array("i", [0 if d >= 0 else -1 for d in dist])
+        return self._zero_h
+
+    def _static_distances(self) -> "array[int]":
+        """Returns the turns-to-goal lower bound of every zone.
+
+        Returns:
+            The repaired distance field after closures, else the graph's
+            static distances; -1 marks zones that cannot reach the end hub.
+        """
+        if self._distances is not None:
+            return self._distances.dist
+        return self.graph.distances_to_end()
+
+    def _find_path(
+        self,
+        start_turn: int,
+        start_zone: int | None = None,
+        search: str | None = None,
+    ) -> list[tuple[int, int]]:
+        """Searches a single drone's route within an adaptive horizon.
+
+        The first horizon is the static distance to the end hub counted
+        from the later of the start turn and the last booked turn. Past
+        that turn every zone and link is free, so a drone that can hold at
+        a hub always fits. The horizon is doubled only when a search fails,
+        up to `max_search_turns`.
+
+        Args:
+            start_turn: The turn at which the drone departs.
+            start_zone: Zone the drone departs from; the start hub if None.
+            search: Search mode to use; the planner's mode if None.
+
+        Returns:
+            List of (turn, zone_id) tuples if a route is found, else empty.
+        """
+        zone = self.graph.start if start_zone is None else start_zone
+        dist = self._static_distances()[zone]
+        if dist < 0:
+            return []
+        search = self.search if search is None else search
+        find = (
+            self._find_interval_path
+            if search == "sipp"
+            else self._find_expanded_path
+        )
+        horizon = max(start_turn, self.reservations.end) + dist
+        while True:
+            horizon = min(horizon, self.max_search_turns)
+            path = find(start_turn, start_zone, horizon)
+            if path or horizon >= self.max_search_turns:
+                return path
+            horizon *= 2
+
+    def _find_interval_path(
+        self, start_turn: int, start_zone: int | None, max_turns: int
+    ) -> list[tuple[int, int]]:
+        """Runs the safe-interval search for a single drone.
 
         Args:
-            start_turn: The turn at which the drone departs the start hub.
+            start_turn: The turn at which the drone departs.
+            start_zone: Zone the drone departs from; the start hub if None.
+            max_turns: Latest turn the search may reach.
 
         Returns:
-            List of (turn, zone) tuples if a route is found, else empty list.
+            List of (turn, zone_id) tuples if a route is found, else empty.
         """
-        start = self.graph.start_zone.name
-        end = self.graph.end_zone.name
+        sipp = self._sipp
+        before = (sipp.expanded, sipp.pushes, sipp.pops)
+        path = sipp.find_path(
+            start_turn, max_turns, self._heuristic(), start_zone
+        )
+        self.expanded += sipp.expanded - before[0]
+        self.pushes += sipp.pushes - before[1]
+        self.pops += sipp.pops - before[2]
+        return path
+
+    def _find_expanded_path(
+        self, start_turn: int, start_zone: int | None, max_turns: int
+    ) -> list[tuple[int, int]]:
+        """Runs a time-expanded Dijkstra or A* search for a single drone.
+
+        The heap is ordered by (turn + heuristic, turn, -priority, zone).
+        With a zero heuristic this is the plain (turn, -priority) Dijkstra
+        order. The A* heuristic is consistent and ties on the estimate go to
+        the earlier turn, so every state is settled after all of its
+        predecessors and both modes return the same path.
 
-        # heap entry: (turn, -priority_score, zone_name)
+        Args:
+            start_turn: The turn at which the drone departs.
+            start_zone: Zone the drone departs from; the start hub if None.
+            max_turns: Latest turn the search may reach.
+
+        Returns:
+            List of (turn, zone_id) tuples if a route is found, else empty.
+        """
+        cg = self.graph
+        n = cg.nb_zones
+        start = cg.start if start_zone is None else start_zone
+        end = cg.end
+        offsets, targets, edges = cg.adj_offsets, cg.adj_targets, cg.adj_edges
+        move_cost, zone_type = cg.move_cost, cg.zone_type
+        zone_is_free, link_is_free = self._probes()
+        stats = self.stats
+        h = self._heuristic()
+        if h[start] < 0:
+            return []
+
+        # heap entry: (turn + h, turn, -priority_score, zone_id)
         # priority score acts as a tie-breaker so priority zones are preferred
-        pq: list[tuple[int, int, str]] = [(start_turn, 0, start)]
-        visited: set[tuple[int, str]] = set()
-        came_from: dict[tuple[int, str], tuple[int, str]] = {}
-        best_cost: dict[tuple[int, str], tuple[int, int]] = {
-            (start_turn, start): (start_turn, 0)
+        start_state = start_turn * n + start
+        pq: list[tuple[int, int, int, int]] = [
+            (start_turn + h[start], start_turn, 0, start)
+        ]
+        visited: set[int] = set()
+        came_from: dict[int, int] = {}
+        best_cost: dict[int, tuple[int, int]] = {
+            start_state: (start_turn, 0)
         }
 
+        def better_parent(child: int, parent: int) -> bool:
+            """Breaks exact cost ties the way Dijkstra's pop order would."""
+            old = came_from[child]
+            new_key = (parent // n, best_cost[parent][1], parent % n)
+            old_key = (old // n, best_cost[old][1], old % n)
+            return new_key < old_key
+
+        # the heap is largest right before a pop
+        pops = peak = 0
         while pq:
-            curr_turn, neg_p, curr_zone = heapq.heappop(pq)
-            state = (curr_turn, curr_zone)
-            priority_score = -neg_p
+            if stats is not None and len(pq) > peak:
+                peak = len(pq)
+            _, curr_turn, neg_p, curr_zone = heapq.heappop(pq)
+            pops += 1
+            state = curr_turn * n + curr_zone
 
             # goal reached: reconstruct and return path
             if curr_zone == end:
-                return self._trace_path(
-                    state, (start_turn, start), came_from
-                )
+                self._end_search(pops, len(pq), peak)
+                return self._trace_path(state, start_state, came_from)
 
             # skip visited states or states exceeding search limit
-            if state in visited or curr_turn > self.max_search_turns:
+            if state in visited or curr_turn > max_turns:
                 continue
             visited.add(state)
+            self.expanded += 1
 
             # option 1: wait in place for one turn
             wait_turn = curr_turn + 1
-            if (
-                wait_turn <= self.max_search_turns
-                and self._zone_is_free(curr_zone, wait_turn)
-            ):
-                wait_state = (wait_turn, curr_zone)
-                wait_cost = (wait_turn, -priority_score)
-                if (
-                    wait_state not in visited
-                    and wait_cost < best_cost.get(wait_state, (10**9, 0))
-                ):
-                    best_cost[wait_state] = wait_cost
-                    came_from[wait_state] = state
-                    heapq.heappush(
-                        pq, (wait_turn, -priority_score, curr_zone)
-                    )
+            if wait_turn <= max_turns and zone_is_free(curr_zone, wait_turn):
+                wait_state = state + n
+                wait_cost = (wait_turn, neg_p)
+                old_cost = best_cost.get(wait_state, (10**9, 0))
+                if wait_state not in visited:
+                    if wait_cost < old_cost:
+                        best_cost[wait_state] = wait_cost
+                        came_from[wait_state] = state
+                        heapq.heappush(
+                            pq,
+                            (wait_turn + h[curr_zone], wait_turn, neg_p,
+                             curr_zone),
+                        )
+                    elif wait_cost == old_cost and better_parent(
+                        wait_state, state
+                    ):
+                        came_from[wait_state] = state
 
             # option 2: move to a neighboring zone
-            for neighbor in self.graph.get_neighbours(curr_zone):
-                neighbor_zone = self.graph.get_zone(neighbor)
-                # blocked zones cannot be entered
-                if (
-                    not neighbor_zone
-                    or neighbor_zone.zone_type == "blocked"
-                ):
-                    continue
-
-                cost = self.graph.get_move_cost(neighbor)
-                if cost <= 0:
+            for k in range(offsets[curr_zone], offsets[curr_zone + 1]):
+                neighbor = targets[k]
+                # blocked zones cannot be entered (their move cost is 0),
+                # and zones that cannot reach the goal are never useful
+                cost = move_cost[neighbor]
+                if cost <= 0 or h[neighbor] < 0:
                     continue
 
                 arrival_turn = curr_turn + cost
-                if arrival_turn > self.max_search_turns:
+                if arrival_turn > max_turns:
                     continue
 
                 # check connection capacity for all transit turns
+                edge = edges[k]
                 link_ok = True
                 for t in range(curr_turn, arrival_turn):
-                    if not self._link_is_free(curr_zone, neighbor, t):
+                    if not link_is_free(edge, t):
                         link_ok = False
                         break
 
                 # move if connection is free and destination has space
-                if link_ok and self._zone_is_free(neighbor, arrival_turn):
-                    move_state = (arrival_turn, neighbor)
+                if link_ok and zone_is_free(neighbor, arrival_turn):
+                    move_state = arrival_turn * n + neighbor
                     if move_state not in visited:
                         # bonus priority score if entering a priority zone
-                        p_bonus = (
-                            1 if neighbor_zone.zone_type == "priority" else 0
+                        new_neg_p = (
+                            neg_p - 1
+                            if zone_type[neighbor] == ZONE_PRIORITY
+                            else neg_p
                         )
-                        new_p = priority_score + p_bonus
-                        move_cost = (arrival_turn, -new_p)
+                        move_cost_key = (arrival_turn, new_neg_p)
+                        old_cost = best_cost.get(move_state, (10**9, 0))
 
                         # only update and push if this is a better path
-                        if move_cost < best_cost.get(move_state, (10**9, 0)):
-                            best_cost[move_state] = move_cost
+                        if move_cost_key < old_cost:
+                            best_cost[move_state] = move_cost_key
                             came_from[move_state] = state
                             heapq.heappush(
-                                pq, (arrival_turn, -new_p, neighbor)
+                                pq,
+                                (arrival_turn + h[neighbor], arrival_turn,
+                                 new_neg_p, neighbor),
                             )
+                        elif move_cost_key == old_cost and better_parent(
+                            move_state, state
+                        ):
+                            came_from[move_state] = state
 
+        self._end_search(pops, 0, peak)
         return []
 
-    def _reserve_path(self, path: list[tuple[int, str]]) -> None:
+    def _reserve_path(
+        self, path: list[tuple[int, int]], count: int = 1
+    ) -> None:
         """Marks all zones and links used by a path as booked.
 
         Args:
-            path: The planned route for a drone.
+            path: The planned route for a drone, as (turn, zone_id) steps.
+            count: 1 to book the path, -1 to release it again.
         """
-        for j in range(len(path) - 1):
-            t_from, z_from = path[j]
-            t_to, z_to = path[j + 1]
+        edges = [
+            self.graph.edge_between(path[j][1], path[j + 1][1])
+            if path[j][1] != path[j + 1][1]
+            else -1
+            for j in range(len(path) - 1)
+        ]
+        self.reservations.book_path(path, edges, count)
 
-            # book destination zone at arrival turn
-            self.zone_reservations[t_to][z_to] += 1
+    def _book_plan(self, paths: list[list[tuple[int, int]]]) -> None:
+        """Replaces every booking with the bookings of a whole plan.
 
-            # if drone moved, book connection for all transit turns
-            if z_from != z_to:
-                link_key = frozenset({z_from, z_to})
-                for t in range(t_from, t_to):
-                    self.link_reservations[t][link_key] += 1
+        For planners whose returned plan was not searched on this table,
+        so that replan() releases and probes the paths actually kept.
 
-    def solve(self) -> list[list[tuple[int, str]]]:
-        """Plans collision-free paths for all drones, one at a time.
+        Args:
+            paths: One (turn, zone_id) path per drone.
+        """
+        self.reservations.clear()
+        for path in paths:
+            self._reserve_path(path)
+
+    def _route_at(
+        self, route: list[int], departure: int
+    ) -> list[tuple[int, int]] | None:
+        """Shifts a wait-free route to a departure turn if it still fits.
+
+        Args:
+            route: Zone ids from start hub to end hub.
+            departure: Turn at which the drone leaves the start hub.
 
         Returns:
-            List of paths, one per drone.
+            The (turn, zone_id) path, or None if a zone or link on it is
+            fully booked at the shifted turns.
         """
-        all_paths: list[list[tuple[int, str]]] = []
+        cg = self.graph
+        zone_is_free, link_is_free = self._probes()
+        path = [(departure, route[0])]
+        turn = departure
+        for j in range(1, len(route)):
+            zone = route[j]
+            edge = cg.edge_between(route[j - 1], zone)
+            arrival = turn + cg.move_cost[zone]
+            for t in range(turn, arrival):
+                if not link_is_free(edge, t):
+                    return None
+            if not zone_is_free(zone, arrival):
+                return None
+            turn = arrival
+            path.append((turn, zone))
+        return path
+
+    def _to_names(
+        self, path: list[tuple[int, int]]
+    ) -> list[tuple[int, str]]:
+        """Converts a (turn, zone_id) path to the (turn, zone_name) form.
+
+        Args:
+            path: Route as (turn, zone_id) steps.
 
-        for i in range(self.nb_drones):
-            # stagger start turns (i // 2) to reduce congestion at start
-            start_turn = i // 2
+        Returns:
+            The same route as (turn, zone_name) steps.
+        """
+        names = self.graph.names
+        return [(turn, names[zone]) for turn, zone in path]
+
+    def _start_turn(self, drone: int) -> int:
+        """Returns the staggered start turn of a drone.
+
+        Args:
+            drone: Drone index.
+
+        Returns:
+            `drone // stagger`, or 0 when staggering is disabled.
+        """
+        return drone // self.stagger if self.stagger > 0 else 0
+
+    def _plan_prioritized(
+        self,
+        sink: Callable[[list[tuple[int, int]]], None],
+        order: list[int] | None = None,
+        deadline: float | None = None,
+    ) -> int:
+        """Plans drones one at a time, booking each path before the next.
+
+        Args:
+            sink: Called once per drone, in planning order, with its
+                (turn, zone_id) path.
+            order: Drone indices in planning order; index order if None.
+                Start turns stay tied to the drone index.
+            deadline: `time.monotonic()` value after which planning stops
+                with a TimeoutError.
+
+        Returns:
+            The makespan, i.e. the latest arrival turn over all drones.
+        """
+        makespan = 0
+        drones = range(self.nb_drones) if order is None else order
+        stats = self.stats
+
+        for i in drones:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("planning budget exhausted")
+
+            # stagger start turns (i // 2 by default) to reduce congestion
+            start_turn = self._start_turn(i)
+
+            # later drones never query turns before their own start turn
+            if self.windowed and order is None:
+                self.reservations.release_before(start_turn)
+
+            if stats is not None:
+                stats.begin_drone(i, self)
             path = self._find_path(start_turn)
 
             if not path:
@@ -234,7 +610,351 @@ class Pathfinder:
                 )
             else:
                 self._reserve_path(path)
+            if stats is not None:
+                stats.end_drone(self)
+
+            makespan = max(makespan, path[-1][0])
+            sink(path)
+
+        return makespan
+
+    def _plan_cbs(self) -> list[list[tuple[int, int]]]:
+        """Improves the prioritized plan with Conflict-Based Search.
+
+        Falls back to the prioritized plan when CBS runs out of budget or
+        finds nothing shorter.
+
+        Returns:
+            One (turn, zone_id) path per drone.
+        """
+        paths: list[list[tuple[int, int]]] = []
+        makespan = self._plan_prioritized(paths.append)
+
+        # the low level plans on an empty table under CBS constraints;
+        # safe-interval search reads the table directly, so use A* instead
+        low_level = Pathfinder(
+            self.graph,
+            self.nb_drones,
+            search="dijkstra" if self.search == "dijkstra" else "astar",
+        )
+        cbs = CBSPlanner(low_level, self.node_budget, self.time_budget)
+        better = cbs.solve(self.nb_drones, makespan)
+        self.expanded += low_level.expanded
+        self.pushes += low_level.pushes
+        self.pops += low_level.pops
+        if better is None:
+            return paths
+        # the table still holds the prioritized plan
+        self._book_plan(better)
+        return better
+
+    def _stream_ids(
+        self, sink: Callable[[list[tuple[int, int]]], None]
+    ) -> int:
+        """Plans collision-free paths for all drones, in zone-id form.
+
+        Each finished path is handed to `sink` in drone order. The planner
+        only keeps a compact copy, for replan(), and not even that in
+        windowed mode.
+
+        Args:
+            sink: Called once per drone with its (turn, zone_id) path.
+
+        Returns:
+            The makespan, i.e. the latest arrival turn over all drones.
+        """
+        self.plan = CompactPlan(self.graph.names)
+        # static pre-check: fail at once if no route to the end hub exists
+        dist = self._static_distances()
+        if self.nb_drones > 0 and dist[self.graph.start] < 0:
+            raise ValueError(
+                "[ERROR] D1 could not find a path to the goal!"
+                "\nPathfinding is impossible on this map."
+            )
+
+        def emit(path: list[tuple[int, int]]) -> None:
+            if not self.windowed:
+                self.plan.append(path)
+            sink(path)
+
+        if self.planner == "prioritized":
+            makespan = self._plan_prioritized(emit)
+        elif self.planner == "waves":
+            waves = WavePlanner(self)
+            makespan = waves.stream(emit)
+            self.cached_drones = waves.cached
+            self.searched_drones = waves.searched
+        else:
+            if self.planner == "cbs":
+                paths = self._plan_cbs()
+            elif self.planner == "portfolio":
+                paths = PortfolioPlanner(self).solve()
+            else:
+                paths = FlowPlanner(self).solve(self.nb_drones)
+            for path in paths:
+                emit(path)
+            makespan = max((path[-1][0] for path in paths), default=0)
+
+        if self.stats is not None:
+            self.stats.pushes = self.pushes
+            self.stats.pops = self.pops
+            self.stats.expanded = self.expanded
+            self.stats.reservation_bytes = max(
+                self.stats.reservation_bytes, self.reservations.nbytes()
+            )
+        return makespan
+
+    def stream(
+        self, sink: Callable[[list[tuple[int, str]]], None]
+    ) -> int:
+        """Plans collision-free paths for all drones.
+
+        Each finished path is handed to `sink` in drone order instead of
+        being kept, so callers decide what to retain.
+
+        Args:
+            sink: Called once per drone with its (turn, zone_name) path.
+
+        Returns:
+            The makespan, i.e. the latest arrival turn over all drones.
+        """
+        return self._stream_ids(lambda path: sink(self._to_names(path)))
+
+    def solve_compact(self) -> CompactPlan:
+        """Plans collision-free paths for all drones in compact form.
+
+        Outside windowed mode this is the plan kept for replan(), so it
+        reflects later replans.
 
-            all_paths.append(path)
+        Returns:
+            The paths of all drones in flat arrays.
+        """
+        if not self.windowed:
+            self._stream_ids(lambda path: None)
+            return self.plan
+        plan = CompactPlan(self.graph.names)
+        self._stream_ids(plan.append)
+        return plan
 
+    def solve(self) -> list[list[tuple[int, str]]]:
+        """Plans collision-free paths for all drones.
+
+        Returns:
+            List of paths, one per drone.
+        """
+        all_paths: list[list[tuple[int, str]]] = []
+        self.stream(all_paths.append)
         return all_paths
+
+    def _pivot(self, turns: "array[int]", from_turn: int) -> int:
+        """Finds the step a drone replans from.
+
+        Args:
+            turns: Turns of the drone's path.
+            from_turn: Turn of the closure.
+
+        Returns:
+            Index of the step at `from_turn`, or of the arrival of a move
+            still in flight at that turn.
+        """
+        j = 0
+        while j + 1 < len(turns) and turns[j + 1] <= from_turn:
+            j += 1
+        if turns[j] < from_turn and j + 1 < len(turns):
+            # a move in flight always completes
+            j += 1
+        return j
+
+    def _first_closed(
+        self,
+        turns: "array[int]",
+        path_zones: "array[int]",
+        zones: set[int],
+        edges: set[int],
+        from_turn: int,
+    ) -> int:
+        """Finds the first step of a path that a closure invalidates.
+
+        Args:
+            turns: Turns of the drone's path.
+            path_zones: Zone ids of the drone's path.
+            zones: Closed zone ids.
+            edges: Closed edge ids.
+            from_turn: First closed turn.
+
+        Returns:
+            Index j of the first step `j -> j + 1` that occupies a closed
+            zone on or after `from_turn` or starts a move over a closed
+            link from then on, or -1 if the path uses neither.
+        """
+        for j in range(len(turns) - 1):
+            t_from, z_from = turns[j], path_zones[j]
+            t_to, z_to = turns[j + 1], path_zones[j + 1]
+            if t_to < from_turn:
+                continue
+            if z_to in zones:
+                return j
+            if (
+                edges
+                and t_from >= from_turn
+                and z_from != z_to
+                and self.graph.edge_between(z_from, z_to) in edges
+            ):
+                return j
+        return -1
+
+    def _reroute(
+        self,
+        paths: dict[int, list[tuple[int, int]]],
+        pivots: dict[int, int],
+    ) -> dict[int, list[tuple[int, int]]]:
+        """Searches drones again from one step of their paths on.
+
+        The bookings after each pivot are released first, then drones are
+        searched in drone order against everyone else's bookings. If one of
+        them finds no route, every booking is restored before raising.
+
+        Args:
+            paths: Current (turn, zone_id) path of each drone to reroute.
+            pivots: Index of the step each drone is searched from.
+
+        Returns:
+            The new path of each drone.
+
+        Raises:
+            ValueError: If a drone can no longer reach the end hub.
+        """
+        for i, pivot in pivots.items():
+            self._reserve_path(paths[i][pivot:], -1)
+        rerouted: dict[int, list[tuple[int, int]]] = {}
+        for i, pivot in pivots.items():
+            turn, zone = paths[i][pivot]
+            tail = self._find_path(turn, zone, "sipp")
+            if not tail:
+                for k, path in rerouted.items():
+                    self._reserve_path(path[pivots[k]:], -1)
+                for k, path in paths.items():
+                    self._reserve_path(path[pivots[k]:])
+                raise ValueError(
+                    f"[ERROR] D{i + 1} could not find a path to the goal!"
+                    "\nPathfinding is impossible on this map."
+                )
+            self._reserve_path(tail)
+            rerouted[i] = paths[i][:pivot] + tail
+        return rerouted
+
+    def replan(
+        self,
+        closed_zones: list[str],
+        closed_links: list[tuple[str, str]],
+        from_turn: int,
+    ) -> dict[int, list[tuple[int, str]]]:
+        """Routes drones around zones and links closed at `from_turn`.
+
+        Only drones whose remaining path uses a closed zone or link are
+        touched, and each keeps its path up to the step before its first
+        closed zone or link: only the rest is released and searched again,
+        in drone order, against everyone else's bookings. A kept step can
+        take the only way out of another drone, so if any drone finds no
+        route, the repair is undone and every affected drone is searched
+        from its position at `from_turn` instead. Moves in flight at
+        `from_turn` complete first, and a drone that arrives in a closed
+        zone that way leaves it on that turn. A drone already waiting in a
+        closed zone is searched from the turn before, so that it is gone
+        when the zone closes. Every other path stays exactly as it was.
+
+        Rerouted drones often have to queue behind the plan that is already
+        booked, so they always use the safe-interval search, guided by a
+        distance field that is repaired rather than recomputed on each call.
+        Each search still costs about as much as planning that drone in a
+        full solve; the saving is in the drones that are not searched and
+        the prefixes that are kept.
+
+        Args:
+            closed_zones: Names of the zones to close.
+            closed_links: Connections to close, as pairs of zone names.
+            from_turn: First turn on which the closures apply.
+
+        Returns:
+            The new (turn, zone_name) path of every replanned drone, by
+            drone index.
+
+        Raises:
+            ValueError: If there is no plan to repair, a name is unknown,
+                or a replanned drone can no longer reach the end hub.
+        """
+        plan = self.plan
+        if self.windowed or len(plan) != self.nb_drones:
+            raise ValueError(
+                "[ERROR] replanning needs a complete plan from solve() "
+                "outside windowed mode."
+            )
+        cg = self.graph
+        zones: set[int] = set()
+        for name in closed_zones:
+            if name not in cg.index:
+                raise ValueError(f"[ERROR] unknown zone '{name}'.")
+            zones.add(cg.index[name])
+        edges: set[int] = set()
+        for a, b in closed_links:
+            edge = -1
+            if a in cg.index and b in cg.index:
+                edge = cg.edge_between(cg.index[a], cg.index[b])
+            if edge < 0:
+                raise ValueError(
+                    f"[ERROR] no connection between '{a}' and '{b}'."
+                )
+            edges.add(edge)
+
+        for z in zones:
+            self.zone_closed_at[z] = min(
+                self.zone_closed_at.get(z, from_turn), from_turn
+            )
+        for e in edges:
+            self.link_closed_at[e] = min(
+                self.link_closed_at.get(e, from_turn), from_turn
+            )
+        if self._distances is None:
+            self._distances = DistanceField(cg)
+        self._distances.close(zones, edges)
+
+        paths: dict[int, list[tuple[int, int]]] = {}
+        # first step each drone is searched from: the one before its first
+        # closed zone or link, or its position at `from_turn`
+        local: dict[int, int] = {}
+        pivots: dict[int, int] = {}
+        for i in range(len(plan)):
+            start, end = plan.starts[i], plan.ends[i]
+            turns, path_zones = plan.turns[start:end], plan.zones[start:end]
+            first = self._first_closed(
+                turns, path_zones, zones, edges, from_turn
+            )
+            if first < 0:
+                continue
+            pivot = self._pivot(turns, from_turn)
+            if (
+                pivot > 0
+                and turns[pivot] == from_turn
+                and path_zones[pivot] in zones
+                and path_zones[pivot - 1] == path_zones[pivot]
+            ):
+                # a drone waiting in a closed zone must be gone by the time
+                # it closes, so it is searched from the turn before
+                pivot -= 1
+            if pivot < len(turns) - 1:
+                paths[i] = plan.id_path(i)
+                pivots[i] = pivot
+                local[i] = max(first, pivot)
+
+        try:
+            rerouted = self._reroute(paths, local)
+        except ValueError:
+            if local == pivots:
+                raise
+            rerouted = self._reroute(paths, pivots)
+
+        replanned: dict[int, list[tuple[int, str]]] = {}
+        for i, path in rerouted.items():
+            plan.replace(i, path)
+            replanned[i] = plan.path(i)
+        return replanned
@@ -0,0 +1,144 @@
+# plan.py - compact array-backed storage for the paths of a whole fleet
+from array import array
+from typing import Iterator
+
+
+class CompactPlan:
+    """Every drone's path stored in flat typed arrays.
+
+    The steps of all paths live back to back in two `array("i")`: one for
+    turns, one for zone ids. Drone d owns steps `starts[d]` to `ends[d]`.
+    A step costs 8 bytes instead of a tuple, a list slot and, for large
+    turns, an int object. The (turn, zone_name) tuple form is only rebuilt
+    when asked for.
+    """
+
+    def __init__(self, names: list[str]) -> None:
+        # zone names indexed by zone id
+        self.names = names
+        # steps of every path, back to back
+        self.turns = array("i")
+        self.zones = array("i")
+        # steps of drone d are [starts[d], ends[d]) in the step arrays
+        self.starts = array("q")
+        self.ends = array("q")
+
+    @classmethod
+    def from_paths(
+        cls, names: list[str], paths: list[list[tuple[int, str]]]
+    ) -> "CompactPlan":
+        """Builds a plan from paths in (turn, zone_name) form.
+
+        Args:
+            names: Zone names indexed by zone id.
+            paths: One (turn, zone_name) path per drone.
+
+        Returns:
+            The same paths in compact form.
+        """
+        plan = cls(names)
+        index = {name: zone for zone, name in enumerate(names)}
+        for path in paths:
+            plan.append([(turn, index[name]) for turn, name in path])
+        return plan
+
+    def __len__(self) -> int:
+        """Returns the number of drones in the plan."""
+        return len(self.starts)
+
+    def append(self, path: list[tuple[int, int]]) -> None:
+        """Adds the path of the next drone.
+
+        Args:
+            path: Route as (turn, zone_id) steps.
+        """
+        self.starts.append(len(self.turns))
+        self.turns.extend(turn for turn, _ in path)
+        self.zones.extend(zone for _, zone in path)
+        self.ends.append(len(self.turns))
+
+    def replace(self, drone: int, path: list[tuple[int, int]]) -> None:
+        """Swaps a drone's path for a new one.
+
+        The new path is written over the old steps when it fits and is
+        appended otherwise, so no other drone's steps move.
+
+        Args:
+            drone: Drone index.
+            path: New route as (turn, zone_id) steps.
+        """
+        start = self.starts[drone]
+        if len(path) > self.ends[drone] - start:
+            start = len(self.turns)
+            self.turns.extend(turn for turn, _ in path)
+            self.zones.extend(zone for _, zone in path)
+        else:
+            for k, (turn, zone) in enumerate(path):
+                self.turns[start + k] = turn
+                self.zones[start + k] = zone
+        self.starts[drone] = start
+        self.ends[drone] = start + len(path)
+
+    def view(self, drone: int) -> tuple[memoryview, memoryview]:
+        """Returns zero-copy views of one drone's turns and zone ids.
+
+        The plan cannot grow while a view is alive, so release views
+        before appending or replacing paths.
+
+        Args:
+            drone: Drone index.
+
+        Returns:
+            (turns, zone_ids) memoryviews over the drone's steps.
+        """
+        start, end = self.starts[drone], self.ends[drone]
+        turns = memoryview(self.turns)[start:end]
+        zones = memoryview(self.zones)[start:end]
+        return turns, zones
+
+    def id_path(self, drone: int) -> list[tuple[int, int]]:
+        """Rebuilds one drone's path in (turn, zone_id) form.
+
+        Args:
+            drone: Drone index.
+
+        Returns:
+            The drone's route as (turn, zone_id) steps.
+        """
+        start, end = self.starts[drone], self.ends[drone]
+        return list(zip(self.turns[start:end], self.zones[start:end]))
+
+    def path(self, drone: int) -> list[tuple[int, str]]:
+        """Rebuilds one drone's path in (turn, zone_name) form.
+
+        Args:
+            drone: Drone index.
+
+        Returns:
+            The drone's route as (turn, zone_name) steps.
+        """
+        names = self.names
+        return [(turn, names[zone]) for turn, zone in self.id_path(drone)]
+
+    def __iter__(self) -> Iterator[list[tuple[int, str]]]:
+        """Yields every drone's (turn, zone_name) path, one at a time."""
+        for drone in range(len(self)):
+            yield self.path(drone)
+
+    def makespan(self) -> int:
+        """Returns the latest arrival turn over all drones."""
+        return max(
+            (
+                self.turns[end - 1]
+                for start, end in zip(self.starts, self.ends)
+                if end > start
+            ),
+            default=0,
+        )
+
+    def nbytes(self) -> int:
+        """Returns the memory held by the plan's arrays, in bytes."""
+        return sum(
+            a.itemsize * len(a)
+            for a in (self.turns, self.zones, self.starts, self.ends)
+        )
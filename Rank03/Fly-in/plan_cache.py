@@ -0,0 +1,346 @@
+# plan_cache.py - persistent LRU cache of solved plans
+import argparse
+import hashlib
+import json
+import os
+import struct
+from array import array
+from graph import CompiledGraph
+from map_cache import read_little_endian, to_little_endian, write_cache
+from pathfinder import Pathfinder, PLANNER_VERSION
+from plan import CompactPlan
+
+# suffix of cache entries inside the cache directory
+ENTRY_SUFFIX = ".plan"
+STATS_FILE = "stats.json"
+# bumped whenever the entry layout or the key derivation changes
+FORMAT_VERSION = 1
+MAGIC = b"FLYP"
+# magic, format version, number of drones, number of steps
+HEADER = struct.Struct("<4sHqq")
+# default size cap of the whole cache directory
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+def default_directory() -> str:
+    """Returns the per-user cache directory for plans."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "fly-in", "plans")
+
+
+def plan_key(pathfinder: Pathfinder) -> str:
+    """Derives the cache key of the plan a pathfinder would produce.
+
+    The key covers the compiled graph, i.e. exactly what the planner
+    reads: comments, coordinates, colors and the order of zone lines do
+    not change it, while the order of connections does, since it sets
+    the neighbour order and thus tie-breaking. The drone count, every
+    planner option and PLANNER_VERSION are hashed as well.
+
+    Args:
+        pathfinder: A configured, not necessarily solved, Pathfinder.
+
+    Returns:
+        The key as a hex digest.
+    """
+    graph: CompiledGraph = pathfinder.graph
+    h = hashlib.sha256()
+    h.update(struct.pack("<HH", FORMAT_VERSION, PLANNER_VERSION))
+    h.update("\n".join(graph.names).encode())
+    h.update(
+        struct.pack("<qqq", graph.start, graph.end, pathfinder.nb_drones)
+    )
+    for a in (
+        graph.zone_type,
+        graph.move_cost,
+        graph.capacity,
+        graph.edge_u,
+        graph.edge_v,
+        graph.edge_capacity,
+        graph.adj_offsets,
+        graph.adj_targets,
+        graph.adj_edges,
+    ):
+        h.update(struct.pack("<cq", a.typecode.encode(), len(a)))
+        h.update(to_little_endian(a))
+    # windowed only changes memory use, not the paths
+    options = {
+        "search": pathfinder.search,
+        "planner": pathfinder.planner,
+        "node_budget": pathfinder.node_budget,
+        "time_budget": pathfinder.time_budget,
+        "stagger": pathfinder.stagger,
+        "workers": pathfinder.workers,
+    }
+    h.update(json.dumps(options, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def encode_plan(plan: CompactPlan) -> bytes:
+    """Serializes a plan, dropping steps left behind by replans.
+
+    Args:
+        plan: Plan to store.
+
+    Returns:
+        The entry content.
+    """
+    turns, zones = array("i"), array("i")
+    starts, ends = array("q"), array("q")
+    for drone in range(len(plan)):
+        start, end = plan.starts[drone], plan.ends[drone]
+        starts.append(len(turns))
+        turns.extend(plan.turns[start:end])
+        zones.extend(plan.zones[start:end])
+        ends.append(len(turns))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(plan), len(turns))
+    return b"".join(
+        [header]
+        + [to_little_endian(a) for a in (starts, ends, turns, zones)]
+    )
+
+
+def decode_plan(names: list[str], content: bytes) -> CompactPlan | None:
+    """Rebuilds a plan from entry content.
+
+    Args:
+        names: Zone names indexed by zone id.
+        content: The entry content.
+
+    Returns:
+        The plan, or None if the entry is from another format version or
+        is damaged.
+    """
+    if len(content) < HEADER.size:
+        return None
+    magic, version, nb_drones, nb_steps = HEADER.unpack_from(content)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    buf = memoryview(content)
+    plan = CompactPlan(names)
+    read = read_little_endian
+    try:
+        offset = HEADER.size
+        plan.starts, offset = read("q", buf, offset, nb_drones)
+        plan.ends, offset = read("q", buf, offset, nb_drones)
+        plan.turns, offset = read("i", buf, offset, nb_steps)
+        plan.zones, offset = read("i", buf, offset, nb_steps)
+    except ValueError:
+        return None
+    if offset != len(buf):
+        return None
+    zones = plan.zones
+    if zones and not 0 <= min(zones) <= max(zones) < len(names):
+        return None
+    return plan
+
+
+class PlanCache:
+    """On-disk LRU cache of solved plans with a total size cap.
+
+    Each entry is one file named after its key. A hit refreshes the
+    entry's modification time, and after every store the least recently
+    used entries are deleted until the directory fits in `max_bytes`.
+    Hit, miss and eviction counts are kept for this instance and added
+    to running totals in the directory's stats file. Every disk error is
+    treated as a miss, so an unwritable cache only costs the speed-up.
+
+    Planners bounded by `time_budget` ("cbs", "portfolio") may return a
+    different plan from one run to the next; their cached plan is the
+    first one stored.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        # counts for this instance only
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        """Returns the file path of an entry."""
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str, names: list[str]) -> CompactPlan | None:
+        """Looks up a plan and marks it as recently used.
+
+        Args:
+            key: Key from plan_key().
+            names: Zone names indexed by zone id.
+
+        Returns:
+            The stored plan, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                plan = decode_plan(names, f.read())
+            if plan is not None:
+                os.utime(path)
+        except OSError:
+            plan = None
+        if plan is None:
+            self.misses += 1
+            self._record(misses=1)
+        else:
+            self.hits += 1
+            self._record(hits=1)
+        return plan
+
+    def put(self, key: str, plan: CompactPlan) -> None:
+        """Stores a plan, then evicts entries over the size cap.
+
+        Args:
+            key: Key from plan_key().
+            plan: Plan to store.
+        """
+        content = encode_plan(plan)
+        if len(content) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            return
+        write_cache(self._path(key), content)
+        self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """Lists entries as (last use, size, path), oldest first."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(ENTRY_SUFFIX):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return []
+        entries.sort()
+        return entries
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until under the cap."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            self.evictions += evicted
+            self._record(evictions=evicted)
+
+    def _record(self, **counts: int) -> None:
+        """Adds counts to the running totals of the stats file."""
+        totals = self._totals()
+        for name, count in counts.items():
+            totals[name] = totals.get(name, 0) + count
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            return
+        write_cache(
+            os.path.join(self.directory, STATS_FILE),
+            json.dumps(totals).encode(),
+        )
+
+    def _totals(self) -> dict[str, int]:
+        """Reads the running totals of the stats file."""
+        try:
+            with open(os.path.join(self.directory, STATS_FILE)) as f:
+                totals = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(totals, dict):
+            return {}
+        return {k: v for k, v in totals.items() if isinstance(v, int)}
+
+    def clear(self) -> None:
+        """Deletes every entry; the running totals are kept."""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Returns the counts of this instance and of the directory.
+
+        Returns:
+            `session` and `total` hit/miss/eviction counts, plus the
+            current number of entries and their size in bytes.
+        """
+        entries = self._entries()
+        totals = self._totals()
+        return {
+            "session": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            },
+            "total": {
+                "hits": totals.get("hits", 0),
+                "misses": totals.get("misses", 0),
+                "evictions": totals.get("evictions", 0),
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+            },
+        }
+
+    def solve(self, pathfinder: Pathfinder) -> CompactPlan:
+        """Returns the pathfinder's plan, from the cache when possible.
+
+        A cached plan is not loaded into the pathfinder's reservation
+        table, so replan() needs a fresh solve.
+
+        Args:
+            pathfinder: A configured Pathfinder that has not solved yet.
+
+        Returns:
+            The plan of every drone.
+
+        Raises:
+            ValueError: If no drone can reach the end hub.
+        """
+        key = plan_key(pathfinder)
+        plan = self.get(key, pathfinder.graph.names)
+        if plan is None:
+            plan = pathfinder.solve_compact()
+            self.put(key, plan)
+        return plan
+
+
+def main() -> None:
+    """Prints the cache statistics, or empties the cache."""
+    parser = argparse.ArgumentParser(description="Inspect the plan cache.")
+    parser.add_argument("--dir", help="cache directory (default per-user)")
+    parser.add_argument(
+        "--clear", action="store_true", help="delete every entry"
+    )
+    args = parser.parse_args()
+
+    cache = PlanCache(args.dir)
+    if args.clear:
+        cache.clear()
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# portfolio.py - parallel portfolio over ordering and stagger policies
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from graph import CompiledGraph
+
+if TYPE_CHECKING:
+    from pathfinder import Pathfinder
+
+# a plan in compiled form: one (turn, zone_id) path per drone
+Plan = list[list[tuple[int, int]]]
+
+
+@dataclass(frozen=True)
+class Policy:
+    """One way of running prioritized planning.
+
+    Attributes:
+        stagger: Start-turn divisor; drone i starts at i // stagger
+            (0 starts every drone at turn 0).
+        order: "index" plans drones in index order, "longest_first"
+            re-plans with the slowest drones of an index-order run first,
+            and "random" plans in a shuffled order.
+        seed: Seed of the shuffle for "random".
+    """
+
+    stagger: int = 2
+    order: str = "index"
+    seed: int = 0
+
+
+def default_policies(restarts: int = 4) -> list[Policy]:
+    """Returns the standard portfolio, baseline policy first.
+
+    Args:
+        restarts: Number of randomized-order restarts to include.
+
+    Returns:
+        List of policies to try.
+    """
+    policies = [Policy()]
+    policies += [Policy(stagger=d) for d in (0, 1, 3, 4)]
+    policies += [Policy(order="longest_first"), Policy(1, "longest_first")]
+    policies += [
+        Policy(order="random", seed=s) for s in range(1, restarts + 1)
+    ]
+    return policies
+
+
+def run_policy(
+    graph: CompiledGraph,
+    nb_drones: int,
+    search: str,
+    policy: Policy,
+    deadline: float | None,
+) -> Plan | None:
+    """Plans the fleet under one policy; runs inside a worker process.
+
+    Args:
+        graph: Picklable compiled graph.
+        nb_drones: Number of drones to plan.
+        search: Single-drone search mode.
+        policy: Ordering and stagger policy.
+        deadline: `time.monotonic()` value after which to give up.
+
+    Returns:
+        Paths indexed by drone, or None if the deadline passed first.
+    """
+    # imported here: pathfinder imports this module for its planner option
+    from pathfinder import Pathfinder
+
+    def plan(order: list[int] | None) -> Plan:
+        pf = Pathfinder(
+            graph, nb_drones, search=search, stagger=policy.stagger
+        )
+        planned = list(range(nb_drones)) if order is None else order
+        paths: Plan = [[] for _ in range(nb_drones)]
+        it = iter(planned)
+        pf._plan_prioritized(
+            lambda path: paths.__setitem__(next(it), path), order, deadline
+        )
+        return paths
+
+    try:
+        if policy.order == "random":
+            order = list(range(nb_drones))
+            random.Random(policy.seed).shuffle(order)
+            return plan(order)
+
+        paths = plan(None)
+        if policy.order == "longest_first":
+            # slowest drones of the first pass get first pick of the airspace
+            order = sorted(
+                range(nb_drones),
+                key=lambda i: paths[i][0][0] - paths[i][-1][0],
+            )
+            retry = plan(order)
+            if makespan(retry) < makespan(paths):
+                paths = retry
+        return paths
+    except TimeoutError:
+        return None
+
+
+def makespan(paths: Plan) -> int:
+    """Returns the latest arrival turn of a plan."""
+    return max((path[-1][0] for path in paths), default=0)
+
+
+class PortfolioPlanner:
+    """Runs several planning policies in parallel and keeps the best plan.
+
+    Each policy runs in its own worker process on the pickled compiled
+    graph. The plan with the smallest makespan, then the smallest total of
+    arrival turns, wins. Workers stop on their own once the wall-clock
+    budget is spent, except the baseline policy, which runs until a plan
+    exists. Once the budget is spent and some plan has arrived, the
+    remaining workers are terminated rather than waited for. The winning
+    plan is booked into the pathfinder's reservation table.
+    """
+
+    def __init__(
+        self,
+        pathfinder: "Pathfinder",
+        policies: list[Policy] | None = None,
+    ) -> None:
+        self.pathfinder = pathfinder
+        self.policies = policies or default_policies()
+        # policy that produced the last returned plan
+        self.best_policy: Policy | None = None
+        # number of policies that finished within the budget
+        self.completed = 0
+
+    def solve(self) -> Plan:
+        """Runs the portfolio within the pathfinder's time budget.
+
+        Returns:
+            One (turn, zone_id) path per drone.
+        """
+        # imported here: multiprocessing is slow to load and only this
+        # planner needs it
+        import multiprocessing
+        import queue
+
+        pf = self.pathfinder
+        deadline = time.monotonic() + pf.time_budget
+        workers = pf.workers or os.cpu_count() or 1
+        self.completed = 0
+
+        # (policy index, paths or None, error) of every finished worker
+        finished: queue.SimpleQueue[
+            tuple[int, Plan | None, BaseException | None]
+        ] = queue.SimpleQueue()
+        pool = multiprocessing.Pool(min(workers, len(self.policies)))
+
+        def submit(k: int, policy: Policy) -> None:
+            pool.apply_async(
+                run_policy,
+                (
+                    pf.graph,
+                    pf.nb_drones,
+                    pf.search,
+                    policy,
+                    None if k == 0 else deadline,
+                ),
+                callback=lambda paths: finished.put((k, paths, None)),
+                error_callback=lambda error: finished.put((k, None, error)),
+            )
+
+        results: list[tuple[int, int, int, Plan]] = []
+        try:
+            for k, policy in enumerate(self.policies):
+                submit(k, policy)
+            for _ in self.policies:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 and results:
+                    break
+                try:
+                    k, paths, error = finished.get(
+                        timeout=max(timeout, 0) if results else None
+                    )
+                except queue.Empty:
+                    break
+                if error is not None:
+                    raise error
+                if paths is None:
+                    continue
+                self.completed += 1
+                cost = sum(path[-1][0] for path in paths)
+                results.append((makespan(paths), cost, k, paths))
+        finally:
+            # the baseline may still be running; its plan is not needed
+            pool.terminate()
+            pool.join()
+
+        best = min(results, key=lambda r: r[:3])
+        self.best_policy = self.policies[best[2]]
+        # the workers booked nothing here, so replan() needs the winner
+        pf._book_plan(best[3])
+        return best[3]
@@ -0,0 +1,134 @@
+# replay.py - per-turn drone states of a plan, for seeking in any direction
+import numpy as np
+import numpy.typing as npt
+from graph import Graph
+from plan import CompactPlan
+from simulation import SimulationEngine
+
+
+class Replay:
+    """Drone states of every turn, precomputed for random access.
+
+    The state of drone d after turn t is `states[t, d]`: a zone id below
+    `nb_zones`, else a connection being crossed, coded as
+    `nb_zones + 2 * edge + direction` where direction is 0 when moving
+    from the edge's first zone to its second. States match the visual
+    state yielded by SimulationEngine.run(), turn 0 being every drone at
+    the first zone of its path. The table takes 4 bytes per drone and
+    turn, e.g. 80 MB for 10k drones over 2000 turns.
+    """
+
+    def __init__(self, graph: Graph, plan: CompactPlan) -> None:
+        """Builds the state table.
+
+        Args:
+            graph: The map's graph.
+            plan: The plan to replay.
+        """
+        self.engine = SimulationEngine(graph, plan)
+        cg = graph.compile()
+        self.names = cg.names
+        self.nb_zones = cg.nb_zones
+        self.edge_u = cg.edge_u
+        self.edge_v = cg.edge_v
+        self.max_turn = self.engine.max_turn
+        self.nb_drones = len(plan)
+
+        # every live step of every drone, replanned leftovers skipped
+        starts = np.frombuffer(plan.starts, dtype=np.int64)
+        lengths = np.frombuffer(plan.ends, dtype=np.int64) - starts
+        drone = np.repeat(np.arange(self.nb_drones, dtype=np.int64), lengths)
+        index = np.arange(drone.size, dtype=np.int64) + np.repeat(
+            starts - (np.cumsum(lengths) - lengths), lengths
+        )
+        turns = np.frombuffer(plan.turns, dtype=np.int32)[index]
+        zones = np.frombuffer(plan.zones, dtype=np.int32)[index]
+
+        # one change per arrival and per transit turn, -1 elsewhere
+        changes = np.full(
+            (self.max_turn + 1, self.nb_drones), -1, dtype=np.int32
+        )
+        # drones without a path stay at the start hub, like in main.py
+        changes[0] = cg.start
+        firsts = np.cumsum(lengths)[lengths > 0] - lengths[lengths > 0]
+        changes[0, drone[firsts]] = zones[firsts]
+        changes[turns, drone] = zones
+
+        # multi-turn moves put the drone on the connection meanwhile
+        moves = np.flatnonzero(
+            (drone[1:] == drone[:-1])
+            & (zones[1:] != zones[:-1])
+            & (turns[1:] - turns[:-1] > 1)
+        )
+        for j in moves.tolist():
+            a, b = int(zones[j]), int(zones[j + 1])
+            edge = cg.edge_between(a, b)
+            if edge < 0:
+                continue
+            code = self.nb_zones + 2 * edge + (cg.edge_u[edge] != a)
+            changes[turns[j] + 1:turns[j + 1], drone[j]] = code
+
+        # carry every state forward until the drone's next change
+        last = np.where(
+            changes >= 0,
+            np.arange(self.max_turn + 1, dtype=np.int32)[:, None],
+            0,
+        )
+        np.maximum.accumulate(last, axis=0, out=last)
+        self.states: npt.NDArray[np.int32] = np.take_along_axis(
+            changes, last, axis=0
+        )
+
+    def state(self, turn: int) -> npt.NDArray[np.int32]:
+        """Returns the state of every drone after a turn, without copying.
+
+        Args:
+            turn: Turn number, from 0 to max_turn.
+
+        Returns:
+            One state code per drone.
+        """
+        row: npt.NDArray[np.int32] = self.states[turn]
+        return row
+
+    def state_name(self, code: int) -> str:
+        """Converts a state code to a zone name or 'zoneA-zoneB' string.
+
+        Args:
+            code: State code from states.
+
+        Returns:
+            The position string used by SimulationEngine.run().
+        """
+        if code < self.nb_zones:
+            return self.names[code]
+        edge, backward = divmod(code - self.nb_zones, 2)
+        a, b = self.edge_u[edge], self.edge_v[edge]
+        if backward:
+            a, b = b, a
+        return f"{self.names[a]}-{self.names[b]}"
+
+    def visual_state(self, turn: int) -> dict[str, str]:
+        """Returns the state of a turn in SimulationEngine.run() form.
+
+        Args:
+            turn: Turn number, from 0 to max_turn.
+
+        Returns:
+            Dictionary mapping drone ID to current position string.
+        """
+        return {
+            f"D{d + 1}": self.state_name(code)
+            for d, code in enumerate(self.states[turn].tolist())
+        }
+
+    def turn_line(self, turn: int) -> str | None:
+        """Formats the move log line of one turn.
+
+        Args:
+            turn: Turn number, from 1 to max_turn.
+
+        Returns:
+            The "Turn N: D1-zone ..." line, or None if no drone moved.
+        """
+        return self.engine.turn_line(turn)
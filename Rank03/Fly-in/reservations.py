@@ -0,0 +1,230 @@
+# reservations.py - time-indexed occupancy tables for zones and links
+from array import array
+from bisect import bisect_left, insort
+
+
+class ReservationTable:
+    """Dense per-turn booking counts for zones and links.
+
+    Each live turn owns two rows: one count per zone id and one count per
+    edge id. Rows live in a ring indexed by `turn & mask` that doubles in
+    size when a booking falls past its end. Turns after the last booked one
+    read as empty without allocating anything.
+
+    Given per-zone `limits`, the table also keeps the sorted turns at which
+    each zone is full, updated by every booking, so that the safe-interval
+    search finds where an interval ends by binary search instead of
+    rescanning rows on every probe.
+    """
+
+    def __init__(
+        self,
+        nb_zones: int,
+        nb_edges: int,
+        capacity: int = 64,
+        limits: "array[int] | None" = None,
+    ) -> None:
+        self.nb_zones = nb_zones
+        self.nb_edges = nb_edges
+        # zeroed templates, copied over rows when they are recycled
+        self._zero_zones = array("i", bytes(4 * nb_zones))
+        self._zero_edges = array("i", bytes(4 * nb_edges))
+
+        size = 1
+        while size < capacity:
+            size *= 2
+        self._mask = size - 1
+        self._zone_rows = [array("i", self._zero_zones) for _ in range(size)]
+        self._edge_rows = [array("i", self._zero_edges) for _ in range(size)]
+
+        # live turns are [base, end); every other slot holds zeros
+        self.base = 0
+        self.end = 0
+
+        # per-zone capacity and, for zones that were ever full, the sorted
+        # turns at which they are
+        self._limits = limits
+        self._full: dict[int, list[int]] = {}
+
+    def _grow(self, turn: int) -> None:
+        """Enlarges the ring so that `turn` fits in the live window.
+
+        Args:
+            turn: Turn that must become addressable.
+        """
+        old_mask = self._mask
+        size = old_mask + 1
+        while turn - self.base >= size:
+            size *= 2
+        mask = size - 1
+
+        zone_rows = [array("i", self._zero_zones) for _ in range(size)]
+        edge_rows = [array("i", self._zero_edges) for _ in range(size)]
+        for t in range(self.base, self.end):
+            zone_rows[t & mask] = self._zone_rows[t & old_mask]
+            edge_rows[t & mask] = self._edge_rows[t & old_mask]
+
+        self._mask = mask
+        self._zone_rows = zone_rows
+        self._edge_rows = edge_rows
+
+    def _ensure(self, turn: int) -> None:
+        """Makes every turn up to `turn` live, growing the ring if needed.
+
+        Args:
+            turn: Last turn that must be bookable.
+        """
+        if turn < self.base:
+            raise ValueError(
+                f"turn {turn} was already released (window starts at "
+                f"{self.base})."
+            )
+        if turn >= self.end:
+            if turn - self.base > self._mask:
+                self._grow(turn)
+            self.end = turn + 1
+
+    def zone_count(self, zone: int, turn: int) -> int:
+        """Returns the number of drones booked in a zone at a turn.
+
+        Args:
+            zone: Zone id.
+            turn: Simulation turn number.
+
+        Returns:
+            Booked drone count (0 for turns past the last booking).
+        """
+        if turn >= self.end:
+            return 0
+        if turn < self.base:
+            raise ValueError(f"turn {turn} was already released.")
+        return self._zone_rows[turn & self._mask][zone]
+
+    def link_count(self, edge: int, turn: int) -> int:
+        """Returns the number of drones booked on a link at a turn.
+
+        Args:
+            edge: Edge id.
+            turn: Simulation turn number.
+
+        Returns:
+            Booked transit count (0 for turns past the last booking).
+        """
+        if turn >= self.end:
+            return 0
+        if turn < self.base:
+            raise ValueError(f"turn {turn} was already released.")
+        return self._edge_rows[turn & self._mask][edge]
+
+    def first_full_turn(
+        self, zone: int, first: int, last: int, capacity: int
+    ) -> int:
+        """Finds the first turn in first..last at which a zone is full.
+
+        Args:
+            zone: Zone id.
+            first: First turn to check.
+            last: Last turn to check.
+            capacity: Number of drones the zone holds.
+
+        Returns:
+            The first turn with `capacity` or more bookings, or -1.
+        """
+        if first < self.base:
+            raise ValueError(f"turn {first} was already released.")
+        if self._limits is not None and capacity == self._limits[zone]:
+            turns = self._full.get(zone)
+            if not turns:
+                return -1
+            k = bisect_left(turns, first)
+            if k < len(turns) and turns[k] <= min(last, self.end - 1):
+                return turns[k]
+            return -1
+        mask, rows = self._mask, self._zone_rows
+        for t in range(first, min(last, self.end - 1) + 1):
+            if rows[t & mask][zone] >= capacity:
+                return t
+        return -1
+
+    def book_path(
+        self, path: list[tuple[int, int]], edges: list[int], count: int = 1
+    ) -> None:
+        """Books every zone and link used by a path in one pass.
+
+        Args:
+            path: Route as (turn, zone_id) steps.
+            edges: Edge id used by each step `j -> j + 1`, or -1 for waits.
+            count: Amount added to every booking; -1 releases a path that
+                was booked before.
+        """
+        if len(path) < 2:
+            return
+        if path[0][0] < self.base:
+            raise ValueError(
+                f"turn {path[0][0]} was already released (window starts at "
+                f"{self.base})."
+            )
+        self._ensure(path[-1][0])
+        mask = self._mask
+        zone_rows, edge_rows = self._zone_rows, self._edge_rows
+        limits = self._limits
+
+        for j in range(len(path) - 1):
+            t_from = path[j][0]
+            t_to, z_to = path[j + 1]
+
+            # book destination zone at arrival turn
+            row = zone_rows[t_to & mask]
+            row[z_to] += count
+            if limits is not None:
+                booked, limit = row[z_to], limits[z_to]
+                if booked - count < limit <= booked:
+                    insort(self._full.setdefault(z_to, []), t_to)
+                elif booked < limit <= booked - count:
+                    turns = self._full[z_to]
+                    del turns[bisect_left(turns, t_to)]
+
+            # if drone moved, book connection for all transit turns
+            edge = edges[j]
+            if edge >= 0:
+                for t in range(t_from, t_to):
+                    edge_rows[t & mask][edge] += count
+
+    def release_before(self, turn: int) -> None:
+        """Retires every row older than `turn` so its slot can be reused.
+
+        Released turns can no longer be probed or booked.
+
+        Args:
+            turn: First turn that must stay live.
+        """
+        mask = self._mask
+        for t in range(self.base, min(turn, self.end)):
+            self._zone_rows[t & mask][:] = self._zero_zones
+            self._edge_rows[t & mask][:] = self._zero_edges
+        if turn > self.base:
+            self.base = turn
+            self.end = max(self.end, turn)
+        for zone in list(self._full):
+            turns = self._full[zone]
+            del turns[:bisect_left(turns, turn)]
+            if not turns:
+                del self._full[zone]
+
+    def clear(self) -> None:
+        """Drops every booking and makes every turn bookable again."""
+        mask = self._mask
+        for t in range(self.base, self.end):
+            self._zone_rows[t & mask][:] = self._zero_zones
+            self._edge_rows[t & mask][:] = self._zero_edges
+        self.base = 0
+        self.end = 0
+        self._full.clear()
+
+    def nbytes(self) -> int:
+        """Returns the memory held by the reservation rows, in bytes."""
+        size = self._mask + 1
+        return size * (
+            self._zero_zones.itemsize * self.nb_zones
+            + self._zero_edges.itemsize * self.nb_edges
+        )
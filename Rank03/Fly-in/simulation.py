@@ -1,6 +1,7 @@
 # simulation.py - converts paths into turn-by-turn simulation and output
-from typing import Generator
+from typing import Generator, TextIO
 from graph import Graph
+from plan import CompactPlan
 
 
 class SimulationEngine:
@@ -9,50 +10,85 @@ class SimulationEngine:
     def __init__(
         self,
         graph: Graph,
-        all_paths: list[list[tuple[int, str]]],
+        all_paths: list[list[tuple[int, str]]] | CompactPlan,
     ) -> None:
         self.graph = graph
-        self.paths = all_paths
+        # paths interned to zone ids; names are only used to build output
+        self.names = graph.compile().names
+        if isinstance(all_paths, CompactPlan):
+            self.plan = all_paths
+        else:
+            self.plan = CompactPlan.from_paths(self.names, all_paths)
         # total turns is the latest turn any drone arrives at goal
-        self.max_turn: int = max(
-            (path[-1][0] for path in all_paths if path), default=0
-        )
+        self.max_turn: int = self.plan.makespan()
+        # per-turn events, built once instead of rescanning every path
+        self._events = self._build_events()
 
-    def _get_drone_state(
-        self,
-        path: list[tuple[int, str]],
-        turn: int,
-    ) -> tuple[str | None, str]:
-        """Evaluates a drone's action for a specific turn.
+    def _build_events(self) -> list[list[tuple[str, str]]]:
+        """Buckets every drone's arrivals and transit turns by turn.
+
+        Waits need no event: a waiting drone prints nothing and keeps the
+        position it had on the previous turn.
+
+        Returns:
+            For each turn, the (drone_id, zone_or_connection) events of
+            that turn in drone order.
+        """
+        names = self.names
+        plan = self.plan
+        turns, zones = plan.turns, plan.zones
+        events: list[list[tuple[str, str]]] = [
+            [] for _ in range(self.max_turn + 1)
+        ]
+        for d_idx in range(len(plan)):
+            drone_id = f"D{d_idx + 1}"
+            for j in range(plan.starts[d_idx], plan.ends[d_idx] - 1):
+                t_prev, z_prev = turns[j], zones[j]
+                t_next, z_next = turns[j + 1], zones[j + 1]
+                if z_prev == z_next:
+                    continue
+
+                # drone is mid-transit on cnx to restricted zone
+                connection = f"{names[z_prev]}-{names[z_next]}"
+                for turn in range(t_prev + 1, t_next):
+                    events[turn].append((drone_id, connection))
+                # drone arrived at destination zone
+                events[t_next].append((drone_id, names[z_next]))
+        return events
+
+    def turn_line(self, turn: int) -> str | None:
+        """Formats the output line of one turn.
 
         Args:
-            path: Drone route as a list of (turn, zone) tuples.
-            turn: Current simulation turn number.
+            turn: Simulation turn number.
 
         Returns:
-            Tuple of (output_string_or_None, visual_position_string).
+            The "Turn N: D1-zone ..." line, or None if no drone moved.
         """
-        for j in range(len(path) - 1):
-            t_prev, z_prev = path[j]
-            t_next, z_next = path[j + 1]
+        events = self._events[turn]
+        if not events:
+            return None
+        movements = " ".join(
+            f"{drone_id}-{position}" for drone_id, position in events
+        )
+        return f"Turn {turn:>3}: {movements}"
 
-            if t_prev < turn <= t_next:
-                if z_prev == z_next:
-                    # drone is waiting in place, no output
-                    return (None, z_prev)
-                elif turn == t_next:
-                    # drone arrived at destination zone
-                    return (z_next, z_next)
-                else:
-                    # drone is mid-transit on cnx to restricted zone
-                    connection_name = f"{z_prev}-{z_next}"
-                    return (connection_name, connection_name)
-
-        # if simulation continues past arrival, drone remains at goal
-        if path and turn > path[-1][0]:
-            return (None, path[-1][1])
-
-        return (None, path[0][1] if path else "")
+    def write(self, out: TextIO) -> int:
+        """Writes the same move log as run() without any visual state.
+
+        Args:
+            out: Text stream receiving the log.
+
+        Returns:
+            Number of simulated turns.
+        """
+        out.write(f"\n--- SIMULATION START ({self.max_turn} turns) ---\n\n")
+        for turn in range(1, self.max_turn + 1):
+            line = self.turn_line(turn)
+            if line is not None:
+                out.write(line)
+                out.write("\n")
+        return self.max_turn
 
     def run(self) -> Generator[dict[str, str], None, None]:
         """Runs the simulation turns, printing moves and yielding visual state.
@@ -63,24 +99,25 @@ class SimulationEngine:
         print(f"\n--- SIMULATION START ({self.max_turn} turns) ---")
         print()
 
-        for turn in range(1, self.max_turn + 1):
-            movements: list[str] = []
-            visual_state: dict[str, str] = {}
+        # every drone starts at the first zone of its path
+        plan = self.plan
+        visual_state: dict[str, str] = {
+            f"D{d_idx + 1}": self.names[plan.zones[start]]
+            for d_idx, (start, end) in enumerate(zip(plan.starts, plan.ends))
+            if end > start
+        }
 
-            for d_idx, path in enumerate(self.paths):
-                drone_id = f"D{d_idx + 1}"
-                if not path:
-                    continue
-
-                output, visual_pos = self._get_drone_state(path, turn)
-                visual_state[drone_id] = visual_pos
+        for turn in range(1, self.max_turn + 1):
+            # fresh dict per turn, since callers keep the previous one
+            visual_state = dict(visual_state)
 
-                # only print drones that moved
-                if output is not None:
-                    movements.append(f"{drone_id}-{output}")
+            # only drones that moved have events
+            for drone_id, position in self._events[turn]:
+                visual_state[drone_id] = position
 
-            if movements:
-                print(f"Turn {turn:>3}: {' '.join(movements)}")
+            line = self.turn_line(turn)
+            if line is not None:
+                print(line)
 
             # yield passes the visual state dict to pygame for rendering
             yield visual_state
@@ -0,0 +1,251 @@
+# sipp.py - safe-interval path planning over the reservation tables
+import heapq
+from array import array
+from graph import CompiledGraph, ZONE_PRIORITY
+from reservations import ReservationTable
+from stats import PlannerStats
+
+
+class SafeIntervalPlanner:
+    """Single-drone search over (zone, safe interval) states.
+
+    A safe interval is a maximal run of turns during which a zone has spare
+    capacity in the reservation table. Waiting inside an interval is always
+    allowed, so a drone that has to hold for many turns costs one expansion
+    instead of one state per waited turn. Link capacity is checked on every
+    transit turn of a move, including both turns of a restricted-zone entry.
+
+    Zones and links in `zone_closed_at` / `link_closed_at` are unusable
+    from the turn they map to onwards.
+    """
+
+    def __init__(
+        self,
+        graph: CompiledGraph,
+        reservations: ReservationTable,
+        zone_closed_at: dict[int, int] | None = None,
+        link_closed_at: dict[int, int] | None = None,
+        stats: PlannerStats | None = None,
+    ) -> None:
+        self.graph = graph
+        self.reservations = reservations
+        self.zone_closed_at = {} if zone_closed_at is None else zone_closed_at
+        self.link_closed_at = {} if link_closed_at is None else link_closed_at
+        # number of (zone, interval) states expanded so far
+        self.expanded = 0
+        # heap pushes and pops so far
+        self.pushes = 0
+        self.pops = 0
+        # detailed counters, only collected when given
+        self.stats = stats
+
+    def _zone_is_free(self, zone: int, turn: int) -> bool:
+        """Checks if a zone can take one more drone at a turn."""
+        if (
+            self.zone_closed_at
+            and turn >= self.zone_closed_at.get(zone, turn + 1)
+        ):
+            return False
+        # start and end hubs have unlimited capacity per subject rules
+        if zone == self.graph.start or zone == self.graph.end:
+            return True
+        count = self.reservations.zone_count(zone, turn)
+        return count < self.graph.capacity[zone]
+
+    def _link_is_free(self, edge: int, first: int, last: int) -> bool:
+        """Checks if a link has spare capacity on turns first..last."""
+        if (
+            self.link_closed_at
+            and last >= self.link_closed_at.get(edge, last + 1)
+        ):
+            return False
+        cap = self.graph.edge_capacity[edge]
+        for t in range(first, last + 1):
+            if self.reservations.link_count(edge, t) >= cap:
+                return False
+        return True
+
+    def _end_search(self, pops: int, left: int, peak: int) -> None:
+        """Adds the heap work of a finished search to the counters.
+
+        Args:
+            pops: Entries popped by the search.
+            left: Entries still on the heap.
+            peak: Largest heap size seen, only tracked with stats.
+        """
+        self.pops += pops
+        self.pushes += pops + left
+        if self.stats is not None:
+            self.stats.observe_heap(peak)
+
+    def _interval_end(self, zone: int, turn: int, max_turns: int) -> int:
+        """Finds the last turn of the safe interval containing `turn`.
+
+        Args:
+            zone: Zone id, free at `turn`.
+            turn: A turn inside the interval.
+            max_turns: Search horizon, used as the end of open intervals.
+
+        Returns:
+            Last free turn of the interval, capped at `max_turns` and at the
+            turn before the zone closes, but never before `turn`.
+        """
+        limit = max_turns
+        if zone in self.zone_closed_at:
+            limit = max(turn, min(limit, self.zone_closed_at[zone] - 1))
+        if zone == self.graph.start or zone == self.graph.end:
+            return limit
+        capacity = self.graph.capacity[zone]
+        full = self.reservations.first_full_turn(
+            zone, turn + 1, limit, capacity
+        )
+        return limit if full < 0 else full - 1
+
+    def _trace_path(
+        self,
+        goal: tuple[int, int],
+        came_from: dict[tuple[int, int], tuple[tuple[int, int], int]],
+        best: dict[tuple[int, int], tuple[int, int]],
+    ) -> list[tuple[int, int]]:
+        """Rebuilds a turn-by-turn path, expanding waits into single turns.
+
+        Args:
+            goal: (zone, interval_end) state reached at the end hub.
+            came_from: Parent state and departure turn of each state.
+            best: Arrival turn and priority key of each state.
+
+        Returns:
+            List of (turn, zone_id) steps forming the complete route.
+        """
+        path: list[tuple[int, int]] = []
+        key = goal
+        while key in came_from:
+            parent, departure = came_from[key]
+            path.append((best[key][0], key[0]))
+            # the drone holds at the parent zone until it departs
+            for t in range(departure, best[parent][0], -1):
+                path.append((t, parent[0]))
+            key = parent
+        path.append((best[key][0], key[0]))
+        path.reverse()
+        return path
+
+    def find_path(
+        self,
+        start_turn: int,
+        max_turns: int,
+        h: "array[int]",
+        start_zone: int | None = None,
+    ) -> list[tuple[int, int]]:
+        """Searches the earliest-arrival route for one drone.
+
+        States are ordered by (arrival + h, arrival, -priority, zone), the
+        same order as the time-expanded search, so priority zones still win
+        ties between routes that arrive on the same turn.
+
+        Args:
+            start_turn: The turn at which the drone departs.
+            max_turns: Latest turn the search may reach.
+            h: Consistent lower bound on the turns left to the end hub,
+                -1 for zones that cannot reach it.
+            start_zone: Zone the drone departs from; the start hub if None.
+
+        Returns:
+            List of (turn, zone_id) tuples if a route is found, else empty.
+        """
+        cg = self.graph
+        start = cg.start if start_zone is None else start_zone
+        end = cg.end
+        offsets, targets, edges = cg.adj_offsets, cg.adj_targets, cg.adj_edges
+        move_cost, zone_type = cg.move_cost, cg.zone_type
+        zone_is_free, link_is_free = self._zone_is_free, self._link_is_free
+        stats = self.stats
+        if stats is not None:
+            zone_is_free = stats.count_zone(zone_is_free)
+            link_is_free = stats.count_link(link_is_free)
+        if h[start] < 0:
+            return []
+
+        # a state is (zone, last turn of its safe interval)
+        start_key = (start, self._interval_end(start, start_turn, max_turns))
+        # heap entry: (arrival + h, arrival, -priority_score, zone, int_end)
+        pq: list[tuple[int, int, int, int, int]] = [
+            (start_turn + h[start], start_turn, 0, start, start_key[1])
+        ]
+        best: dict[tuple[int, int], tuple[int, int]] = {
+            start_key: (start_turn, 0)
+        }
+        came_from: dict[tuple[int, int], tuple[tuple[int, int], int]] = {}
+        visited: set[tuple[int, int]] = set()
+
+        # the heap is largest right before a pop
+        pops = peak = 0
+        while pq:
+            if stats is not None and len(pq) > peak:
+                peak = len(pq)
+            _, arrival, neg_p, zone, int_end = heapq.heappop(pq)
+            pops += 1
+            key = (zone, int_end)
+            if key in visited:
+                continue
+            visited.add(key)
+            self.expanded += 1
+
+            # goal reached: reconstruct and return path
+            if zone == end:
+                self._end_search(pops, len(pq), peak)
+                return self._trace_path(key, came_from, best)
+
+            for k in range(offsets[zone], offsets[zone + 1]):
+                neighbor = targets[k]
+                # blocked zones cannot be entered (their move cost is 0),
+                # and zones that cannot reach the goal are never useful
+                cost = move_cost[neighbor]
+                if cost <= 0 or h[neighbor] < 0:
+                    continue
+                edge = edges[k]
+                new_neg_p = (
+                    neg_p - 1 if zone_type[neighbor] == ZONE_PRIORITY
+                    else neg_p
+                )
+
+                # scan departures while the drone can keep waiting here;
+                # each hit opens one safe interval of the neighbour
+                departure = arrival
+                last_departure = min(int_end, max_turns - cost)
+                # a closure ends the scan for good
+                for closed_at, key_id in (
+                    (self.zone_closed_at, neighbor),
+                    (self.link_closed_at, edge),
+                ):
+                    if key_id in closed_at:
+                        last_departure = min(
+                            last_departure, closed_at[key_id] - cost
+                        )
+                while departure <= last_departure:
+                    t = departure + cost
+                    if not (
+                        link_is_free(edge, departure, t - 1)
+                        and zone_is_free(neighbor, t)
+                    ):
+                        departure += 1
+                        continue
+
+                    succ_end = self._interval_end(neighbor, t, max_turns)
+                    succ = (neighbor, succ_end)
+                    cost_key = (t, new_neg_p)
+                    if succ not in visited and cost_key < best.get(
+                        succ, (10**9, 0)
+                    ):
+                        best[succ] = cost_key
+                        came_from[succ] = (key, departure)
+                        heapq.heappush(
+                            pq,
+                            (t + h[neighbor], t, new_neg_p, neighbor,
+                             succ_end),
+                        )
+                    # later arrivals in this interval are dominated
+                    departure = succ_end - cost + 1
+
+        self._end_search(pops, 0, peak)
+        return []
@@ -0,0 +1,108 @@
+# spatial.py - uniform grid index of boxes for viewport culling
+import numpy as np
+import numpy.typing as npt
+
+Floats = npt.NDArray[np.float64]
+Ints = npt.NDArray[np.int64]
+
+
+class SpatialGrid:
+    """Uniform grid over axis-aligned boxes, queried by rectangle.
+
+    Every box is registered in each cell it overlaps, so points (zones)
+    and segments (connections, by their bounding box) share one index.
+    Cells are stored CSR-style: the items of cell c are
+    `items[offsets[c]:offsets[c + 1]]`. Queries may return items whose
+    box only shares a cell with the rectangle, never miss one that
+    overlaps it.
+    """
+
+    def __init__(
+        self,
+        x0: Floats,
+        y0: Floats,
+        x1: Floats,
+        y1: Floats,
+        cell_size: float,
+    ) -> None:
+        """Builds the index.
+
+        Args:
+            x0: Left edge of every box.
+            y0: Top edge of every box.
+            x1: Right edge of every box.
+            y1: Bottom edge of every box.
+            cell_size: Side of a grid cell, in the boxes' units.
+        """
+        self.size = len(x0)
+        self.cell_size = max(float(cell_size), 1e-9)
+        if self.size == 0:
+            self.min_x = self.min_y = 0.0
+            self.cols = self.rows = 1
+            self.offsets: Ints = np.zeros(2, dtype=np.int64)
+            self.items: Ints = np.zeros(0, dtype=np.int64)
+            return
+        self.min_x = float(x0.min())
+        self.min_y = float(y0.min())
+        cx0, cy0 = self._cells(x0, y0)
+        cx1, cy1 = self._cells(x1, y1)
+        self.cols = int(cx1.max()) + 1
+        self.rows = int(cy1.max()) + 1
+
+        # one (cell, item) pair per cell a box overlaps
+        width = cx1 - cx0 + 1
+        count = width * (cy1 - cy0 + 1)
+        item = np.repeat(np.arange(self.size, dtype=np.int64), count)
+        # rank of each pair among its box's cells
+        rank = np.arange(item.size, dtype=np.int64) - np.repeat(
+            np.cumsum(count) - count, count
+        )
+        w = width[item]
+        cell = (cy0[item] + rank // w) * self.cols + cx0[item] + rank % w
+        order = np.argsort(cell, kind="stable")
+        self.items = item[order]
+        self.offsets = np.zeros(self.cols * self.rows + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(cell, minlength=self.cols * self.rows),
+            out=self.offsets[1:],
+        )
+
+    def _cells(self, x: Floats, y: Floats) -> tuple[Ints, Ints]:
+        """Returns the column and row of each point, unclamped."""
+        cx = np.floor((x - self.min_x) / self.cell_size).astype(np.int64)
+        cy = np.floor((y - self.min_y) / self.cell_size).astype(np.int64)
+        return cx, cy
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> Ints:
+        """Finds the items whose cells overlap a rectangle.
+
+        Args:
+            x0: Left edge of the rectangle.
+            y0: Top edge of the rectangle.
+            x1: Right edge of the rectangle.
+            y1: Bottom edge of the rectangle.
+
+        Returns:
+            Sorted item indices, each once.
+        """
+        if self.size == 0:
+            return self.items
+        (cx0, cx1), (cy0, cy1) = self._cells(
+            np.array([x0, x1]), np.array([y0, y1])
+        )
+        cx0, cy0 = max(int(cx0), 0), max(int(cy0), 0)
+        cx1, cy1 = min(int(cx1), self.cols - 1), min(int(cy1), self.rows - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return self.items[:0]
+        # each row of cells in range is one contiguous run of offsets
+        rows = np.arange(cy0, cy1 + 1, dtype=np.int64) * self.cols
+        starts = self.offsets[rows + cx0]
+        ends = self.offsets[rows + cx1 + 1]
+        lengths = ends - starts
+        index = np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(
+            starts - (np.cumsum(lengths) - lengths), lengths
+        )
+        # boxes spanning several cells show up more than once
+        found = np.zeros(self.size, dtype=np.bool_)
+        found[self.items[index]] = True
+        return np.flatnonzero(found).astype(np.int64)
@@ -0,0 +1,180 @@
+# stats.py - optional planner instrumentation, phase timings and profiling
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Iterator, ParamSpec, TypeVar
+
+if TYPE_CHECKING:
+    from pathfinder import Pathfinder
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+@dataclass
+class DroneStats:
+    """Search work spent on one drone."""
+
+    drone: int
+    pushes: int = 0
+    pops: int = 0
+    expanded: int = 0
+    # largest open list of the drone's searches
+    heap_peak: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class PlannerStats:
+    """Counters filled in by a Pathfinder given this object as `stats`.
+
+    Phases are timed by the caller, so one object can cover parsing,
+    graph building, solving and simulation. Search totals cover every
+    search of the solve, whatever the planner. Per-drone records are only
+    written by the planners that route drones one at a time
+    ("prioritized" and "waves"). A probe is one capacity check of a zone
+    or link against the reservation table; a miss is a probe that found
+    it full or closed.
+    """
+
+    drones: list[DroneStats] = field(default_factory=list)
+    pushes: int = 0
+    pops: int = 0
+    expanded: int = 0
+    heap_peak: int = 0
+    zone_probes: int = 0
+    zone_misses: int = 0
+    link_probes: int = 0
+    link_misses: int = 0
+    # largest size of the reservation rows seen during the solve
+    reservation_bytes: int = 0
+    # wall time of named phases, in seconds
+    phases: dict[str, float] = field(default_factory=dict)
+    # drone being planned and the counters when it started
+    _current: DroneStats | None = None
+    _started: tuple[int, int, int, float] = (0, 0, 0, 0.0)
+
+    def count_zone(self, check: Callable[P, bool]) -> Callable[P, bool]:
+        """Wraps a zone capacity check so it counts probes and misses."""
+
+        def probe(*args: P.args, **kwargs: P.kwargs) -> bool:
+            self.zone_probes += 1
+            if check(*args, **kwargs):
+                return True
+            self.zone_misses += 1
+            return False
+
+        return probe
+
+    def count_link(self, check: Callable[P, bool]) -> Callable[P, bool]:
+        """Wraps a link capacity check so it counts probes and misses."""
+
+        def probe(*args: P.args, **kwargs: P.kwargs) -> bool:
+            self.link_probes += 1
+            if check(*args, **kwargs):
+                return True
+            self.link_misses += 1
+            return False
+
+        return probe
+
+    def begin_drone(self, drone: int, pathfinder: "Pathfinder") -> None:
+        """Starts the record of one drone.
+
+        Args:
+            drone: Drone index.
+            pathfinder: The planner, whose running counters are read.
+        """
+        self._current = DroneStats(drone)
+        self._started = (
+            pathfinder.pushes,
+            pathfinder.pops,
+            pathfinder.expanded,
+            time.perf_counter(),
+        )
+
+    def end_drone(self, pathfinder: "Pathfinder") -> None:
+        """Closes the record of the drone started last.
+
+        Args:
+            pathfinder: The planner, whose running counters are read.
+        """
+        record = self._current
+        if record is None:
+            return
+        pushes, pops, expanded, start = self._started
+        record.seconds = time.perf_counter() - start
+        record.pushes = pathfinder.pushes - pushes
+        record.pops = pathfinder.pops - pops
+        record.expanded = pathfinder.expanded - expanded
+        self.drones.append(record)
+        self._current = None
+        self.reservation_bytes = max(
+            self.reservation_bytes, pathfinder.reservations.nbytes()
+        )
+
+    def observe_heap(self, size: int) -> None:
+        """Records the largest open list of a finished search.
+
+        Args:
+            size: Peak number of entries in the search's heap.
+        """
+        self.heap_peak = max(self.heap_peak, size)
+        if self._current is not None:
+            self._current.heap_peak = max(self._current.heap_peak, size)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times a block under a phase name, adding up repeated phases.
+
+        Args:
+            name: Phase name, e.g. "parse" or "solve".
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = (
+                self.phases.get(name, 0.0) + time.perf_counter() - start
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the stats as JSON-ready data, slowest drones first.
+
+        Returns:
+            Totals, phases and per-drone records.
+        """
+        data = asdict(self)
+        del data["_current"]
+        del data["_started"]
+        data["drones"].sort(key=lambda d: d["seconds"], reverse=True)
+        return data
+
+
+def profiled(
+    call: Callable[[], T], output: str | None = None, top: int = 25
+) -> tuple[T, str]:
+    """Runs a call under cProfile.
+
+    Args:
+        call: The work to profile, e.g. a Pathfinder's solve method.
+        output: File receiving the raw pstats dump, for snakeviz or
+            `python -m pstats`; not written if None.
+        top: Number of functions in the text report.
+
+    Returns:
+        The call's result and a report of the functions with the most
+        cumulative time.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(call)
+    if output is not None:
+        profiler.dump_stats(output)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(
+        "cumulative"
+    ).print_stats(top)
+    return result, report.getvalue()
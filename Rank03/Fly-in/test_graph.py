@@ -0,0 +1,52 @@
+# test_graph.py - compiled graph capacities on maps with huge limits
+from pathlib import Path
+import pytest
+from graph import Graph
+from parser import map_parser
+from pathfinder import Pathfinder, PLANNERS
+from verifier import verify_plan
+
+HUGE_MAP = """\
+nb_drones: 4
+
+start_hub: start 0 0
+hub: wide 1 0 [max_drones=2147483647]
+hub: huge 2 0 [max_drones=3000000000]
+hub: narrow 1 1 [max_drones=1]
+end_hub: goal 3 0
+
+connection: start-wide [max_link_capacity=3000000000]
+connection: wide-huge
+connection: huge-goal [max_link_capacity=2147483647]
+connection: start-narrow
+connection: narrow-goal
+"""
+
+
+def load(tmp_path: Path) -> tuple[Graph, int]:
+    """Parses the huge-capacity map and returns its graph and fleet size."""
+    map_file = tmp_path / "huge.txt"
+    map_file.write_text(HUGE_MAP)
+    parsed = map_parser(str(map_file))
+    return Graph(parsed), parsed.nb_drones
+
+
+def test_capacities_clamped_to_fleet(tmp_path: Path) -> None:
+    """Caps zone and link capacities at the number of drones."""
+    graph, nb_drones = load(tmp_path)
+    cg = graph.compile()
+    assert cg.capacity[cg.index["wide"]] == nb_drones
+    assert cg.capacity[cg.index["huge"]] == nb_drones
+    assert cg.capacity[cg.index["narrow"]] == 1
+    assert max(cg.edge_capacity) == nb_drones
+
+
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_solve_with_huge_capacities(planner: str, tmp_path: Path) -> None:
+    """Plans and verifies a map whose limits overflow 32-bit integers."""
+    graph, nb_drones = load(tmp_path)
+    pf = Pathfinder(
+        graph, nb_drones, planner=planner, time_budget=5.0, workers=2
+    )
+    pf.solve_compact()
+    assert verify_plan(graph, pf.plan, nb_drones) == []
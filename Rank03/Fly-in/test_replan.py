@@ -0,0 +1,57 @@
+# test_replan.py - replanning after every planner keeps the plan valid
+from pathlib import Path
+import pytest
+import mapgen
+from graph import Graph
+from parser import map_parser
+from pathfinder import Pathfinder, PLANNERS
+from verifier import verify_plan
+
+
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_replan_after_solve(planner: str, tmp_path: Path) -> None:
+    """Closes a zone after a solve and verifies the repaired plan."""
+    map_file = tmp_path / "hubs.txt"
+    map_file.write_text(mapgen.hubs_map(16, 6, 0))
+    parsed = map_parser(str(map_file))
+    graph = Graph(parsed)
+    pf = Pathfinder(
+        graph, parsed.nb_drones, planner=planner, time_budget=5.0, workers=2
+    )
+    pf.solve_compact()
+    # a hub crossed by several drones, with routes around it
+    closed = pf.graph.index["h3_1"]
+    pf.replan(["h3_1"], [], 1)
+
+    assert verify_plan(graph, pf.plan, parsed.nb_drones) == []
+    # from turn 1 on, a drone only enters the closed zone by finishing a
+    # move that was already in flight
+    for i in range(len(pf.plan)):
+        path = pf.plan.id_path(i)
+        for (left, before), (turn, zone) in zip(path, path[1:]):
+            if zone == closed and turn >= 1:
+                assert before != closed and left < 1
+
+
+@pytest.mark.parametrize("planner", PLANNERS)
+def test_replan_leaves_closed_zone(planner: str, tmp_path: Path) -> None:
+    """Moves a drone waiting in a zone out of it before the zone closes."""
+    map_file = tmp_path / "grid.txt"
+    map_file.write_text(mapgen.grid_map(81, 12, 2))
+    parsed = map_parser(str(map_file))
+    graph = Graph(parsed)
+    pf = Pathfinder(
+        graph, parsed.nb_drones, search="sipp", planner=planner,
+        time_budget=5.0, workers=2,
+    )
+    pf.solve_compact()
+    # g5_6 holds a waiting drone on the turn before it closes
+    closed = {pf.graph.index["g3_3"], pf.graph.index["g5_6"]}
+    pf.replan(["g3_3", "g5_6"], [("g3_4", "g3_5")], 15)
+
+    assert verify_plan(graph, pf.plan, parsed.nb_drones) == []
+    for i in range(len(pf.plan)):
+        path = pf.plan.id_path(i)
+        for (left, before), (turn, zone) in zip(path, path[1:]):
+            if zone in closed and turn >= 15:
+                assert before != zone and left < 15
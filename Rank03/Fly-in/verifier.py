@@ -0,0 +1,278 @@
+# verifier.py - vectorized check of a whole plan against the map rules
+from dataclasses import dataclass
+import numpy as np
+import numpy.typing as npt
+from graph import Graph, CompiledGraph
+from plan import CompactPlan
+
+Ints = npt.NDArray[np.int64]
+
+# largest key range counted with a dense bincount; sparser keys are
+# counted by sorting instead
+DENSE_KEYS = 1 << 25
+
+
+@dataclass(frozen=True)
+class Violation:
+    """One broken rule, located by turn and drone(s)."""
+
+    # "count", "start", "end", "order", "wait", "adjacency", "blocked",
+    # "transit", "zone_capacity" or "link_capacity"
+    kind: str
+    turn: int
+    # drone indices, 0-based; all users of the resource for capacities,
+    # none for the plan-wide "count"
+    drones: tuple[int, ...]
+    message: str
+
+    def __str__(self) -> str:
+        """Formats the violation the way the rest of the program errors."""
+        if not self.drones:
+            return f"[ERROR] Turn {self.turn}: {self.message}"
+        names = ", ".join(f"D{d + 1}" for d in self.drones)
+        return f"[ERROR] Turn {self.turn}: {names} {self.message}"
+
+
+def _steps(plan: CompactPlan) -> tuple[Ints, Ints, Ints]:
+    """Flattens the live steps of a plan into drone, turn and zone arrays.
+
+    Steps left behind by replans are skipped, so the result lists every
+    drone's path back to back in drone order.
+
+    Args:
+        plan: Plan to flatten.
+
+    Returns:
+        (drone, turn, zone) arrays with one entry per step.
+    """
+    starts = np.frombuffer(plan.starts, dtype=np.int64)
+    ends = np.frombuffer(plan.ends, dtype=np.int64)
+    lengths = ends - starts
+    drone = np.repeat(np.arange(len(plan), dtype=np.int64), lengths)
+    # position of each step in the plan's step arrays
+    first = np.cumsum(lengths) - lengths
+    index = np.arange(drone.size, dtype=np.int64) + np.repeat(
+        starts - first, lengths
+    )
+    turns = np.frombuffer(plan.turns, dtype=np.int32).astype(np.int64)
+    zones = np.frombuffer(plan.zones, dtype=np.int32).astype(np.int64)
+    return drone, turns[index], zones[index]
+
+
+def _count(keys: Ints) -> tuple[Ints, Ints]:
+    """Counts occurrences of non-negative keys.
+
+    Args:
+        keys: Keys to count.
+
+    Returns:
+        The distinct keys and how often each occurs.
+    """
+    if keys.size == 0:
+        return keys, keys
+    if int(keys.max()) < DENSE_KEYS:
+        counts = np.bincount(keys)
+        used = np.flatnonzero(counts)
+        return used, counts[used]
+    return np.unique(keys, return_counts=True)
+
+
+def _edge_ids(cg: CompiledGraph, za: Ints, zb: Ints) -> Ints:
+    """Looks up the link between each pair of zones.
+
+    Args:
+        cg: Compiled graph.
+        za: Origin zone ids.
+        zb: Destination zone ids.
+
+    Returns:
+        The link id of each pair, -1 where the zones are not linked.
+    """
+    n = cg.nb_zones
+    u = np.frombuffer(cg.edge_u, dtype=np.int32).astype(np.int64)
+    v = np.frombuffer(cg.edge_v, dtype=np.int32).astype(np.int64)
+    # undirected key of every link, sorted for binary search
+    link_keys = np.minimum(u, v) * n + np.maximum(u, v)
+    order = np.argsort(link_keys)
+    sorted_keys = link_keys[order]
+    keys = np.minimum(za, zb) * n + np.maximum(za, zb)
+    pos = np.searchsorted(sorted_keys, keys)
+    pos = np.minimum(pos, max(sorted_keys.size - 1, 0))
+    if sorted_keys.size == 0:
+        return np.full(keys.size, -1, dtype=np.int64)
+    found = sorted_keys[pos] == keys
+    return np.where(found, order[pos], -1).astype(np.int64)
+
+
+def _users(
+    keys: Ints, drones: Ints, bad: Ints
+) -> dict[int, tuple[int, ...]]:
+    """Groups the drones behind each over-capacity key.
+
+    Args:
+        keys: Resource key of every use.
+        drones: Drone of every use.
+        bad: Keys found over capacity.
+
+    Returns:
+        For each bad key, the drones using it, in drone order.
+    """
+    mask = np.isin(keys, bad)
+    users: dict[int, list[int]] = {}
+    for key, drone in zip(keys[mask].tolist(), drones[mask].tolist()):
+        users.setdefault(key, []).append(drone)
+    return {key: tuple(sorted(set(d))) for key, d in users.items()}
+
+
+def verify_plan(
+    graph: Graph | CompiledGraph,
+    plan: CompactPlan | list[list[tuple[int, str]]],
+    nb_drones: int | None = None,
+) -> list[Violation]:
+    """Checks every rule of the map on a whole plan at once.
+
+    Each path must start at the start hub and end at the end hub, with
+    increasing turns. A wait lasts one turn; a move follows a link and
+    takes the destination's move cost (two turns into a restricted zone,
+    never into a blocked one). Occupancy follows the reservation rules: a
+    drone occupies a zone at every arrival turn of its path, waits
+    included, and a link on every transit turn of a move. No zone may
+    hold more than `max_drones` drones and no link more than
+    `max_link_capacity`, except the start and end hubs.
+
+    Args:
+        graph: The map's graph.
+        plan: Compact plan, or one (turn, zone_name) path per drone.
+        nb_drones: Expected number of paths; not checked if None.
+
+    Returns:
+        Every violation, ordered by turn. Empty if the plan is valid.
+
+    Raises:
+        ValueError: If a path names a zone that is not on the map.
+    """
+    cg = graph.compile()
+    n, m = cg.nb_zones, cg.nb_edges
+    found: list[Violation] = []
+    if not isinstance(plan, CompactPlan):
+        for path in plan:
+            for when, name in path:
+                if name not in cg.index:
+                    raise ValueError(
+                        f"[ERROR] Turn {when}: unknown zone '{name}'."
+                    )
+        plan = CompactPlan.from_paths(cg.names, plan)
+    if nb_drones is not None and len(plan) != nb_drones:
+        found.append(
+            Violation(
+                "count", 0, (),
+                f"Plan has {len(plan)} paths for {nb_drones} drones.",
+            )
+        )
+
+    drone, turn, zone = _steps(plan)
+    names = cg.names
+    move_cost = np.frombuffer(cg.move_cost, dtype=np.int8).astype(np.int64)
+    capacity = np.frombuffer(cg.capacity, dtype=np.int32).astype(np.int64)
+    edge_cap = np.frombuffer(
+        cg.edge_capacity, dtype=np.int32
+    ).astype(np.int64)
+
+    # endpoints of every path
+    lengths = np.frombuffer(plan.ends, dtype=np.int64) - np.frombuffer(
+        plan.starts, dtype=np.int64
+    )
+    for k in np.flatnonzero(lengths == 0).tolist():
+        found.append(Violation("start", 0, (k,), "has an empty path."))
+    last = np.cumsum(lengths)[lengths > 0] - 1
+    first = last - lengths[lengths > 0] + 1
+    for k in first[zone[first] != cg.start].tolist():
+        found.append(
+            Violation(
+                "start", int(turn[k]), (int(drone[k]),),
+                f"starts at '{names[zone[k]]}', not the start hub.",
+            )
+        )
+    for k in last[zone[last] != cg.end].tolist():
+        found.append(
+            Violation(
+                "end", int(turn[k]), (int(drone[k]),),
+                f"ends at '{names[zone[k]]}', not the end hub.",
+            )
+        )
+
+    # consecutive steps of the same drone
+    same = drone[1:] == drone[:-1]
+    step = np.flatnonzero(same)
+    a, b = turn[step], turn[step + 1]
+    za, zb = zone[step], zone[step + 1]
+    d = drone[step]
+    waits = za == zb
+    moves = ~waits
+    edge = np.full(step.size, -1, dtype=np.int64)
+    edge[moves] = _edge_ids(cg, za[moves], zb[moves])
+
+    checks = (
+        ("order", b <= a, "goes back in time"),
+        ("wait", waits & (b != a + 1) & (b > a), "waits more than a turn"),
+        ("adjacency", moves & (edge < 0), "moves between unlinked zones"),
+        ("blocked", moves & (edge >= 0) & (move_cost[zb] == 0),
+         "enters a blocked zone"),
+        ("transit",
+         moves & (edge >= 0) & (move_cost[zb] > 0) & (b > a)
+         & (b - a != move_cost[zb]),
+         "takes the wrong number of turns to move"),
+    )
+    for kind, mask, text in checks:
+        for k in np.flatnonzero(mask).tolist():
+            found.append(
+                Violation(
+                    kind, int(b[k]), (int(d[k]),),
+                    f"{text}: '{names[za[k]]}' at turn {int(a[k])} to "
+                    f"'{names[zb[k]]}' at turn {int(b[k])}.",
+                )
+            )
+
+    # zone occupancy: every arrival, waits included, except at the hubs
+    limited = (zb != cg.start) & (zb != cg.end)
+    zone_keys = b[limited] * n + zb[limited]
+    keys, counts = _count(zone_keys)
+    over = keys[counts > capacity[keys % n]]
+    users = _users(zone_keys, d[limited], over)
+    for key in over.tolist():
+        t, z = divmod(key, n)
+        found.append(
+            Violation(
+                "zone_capacity", t, users[key],
+                f"exceed max_drones={int(capacity[z])} of zone "
+                f"'{names[z]}'.",
+            )
+        )
+
+    # link occupancy: one use per transit turn of every valid move
+    used = moves & (edge >= 0) & (b > a)
+    spans = (b - a)[used]
+    link_drones = np.repeat(d[used], spans)
+    link_edges = np.repeat(edge[used], spans)
+    # transit turns a, a + 1, ..., b - 1 of each move
+    offsets = np.arange(link_edges.size, dtype=np.int64) - np.repeat(
+        np.cumsum(spans) - spans, spans
+    )
+    link_turns = np.repeat(a[used], spans) + offsets
+    link_keys = link_turns * m + link_edges
+    keys, counts = _count(link_keys)
+    over = keys[counts > edge_cap[keys % m]] if m else keys
+    users = _users(link_keys, link_drones, over)
+    for key in over.tolist():
+        t, e = divmod(key, m)
+        link = f"{names[cg.edge_u[e]]}-{names[cg.edge_v[e]]}"
+        found.append(
+            Violation(
+                "link_capacity", t, users[key],
+                f"exceed max_link_capacity={int(edge_cap[e])} of "
+                f"connection '{link}'.",
+            )
+        )
+
+    found.sort(key=lambda v: (v.turn, v.drones, v.kind))
+    return found
@@ -1,13 +1,19 @@
 # visualizer.py - pygame graphical interface for the drone simulation
+import math
 import os
+from itertools import compress
+from typing import Iterable, Sequence
 
 # silence pygame prompt and enable retina/hidpi resolution
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 os.environ["SDL_VIDEO_ALLOW_HIGHDPI"] = "1"
 
+import numpy as np  # noqa: E402
+import numpy.typing as npt  # noqa: E402
 import pygame  # noqa: E402
 from graph import Graph  # noqa: E402
 from data import Zone  # noqa: E402
+from spatial import SpatialGrid  # noqa: E402
 
 # rgb color palette (catppuccin mocha inspired)
 COLOR_BG = (30, 30, 46)
@@ -24,6 +30,25 @@ COLOR_DRONE_ARM = (17, 17, 27)
 COLOR_DRONE_ROTOR = (148, 226, 213)
 COLOR_LABEL_BG = (49, 50, 68, 230)
 
+# zone circle radius in pixels
+ZONE_RADIUS = 24
+# above this many zones in view, zones and links are drawn as plain
+# pixels with numpy instead of one pygame call each
+DOT_LIMIT = 3000
+# labels appear once the median connection is this long on screen
+LABEL_SPACING = 30
+# zoom range, relative to the fitted layout
+MIN_ZOOM = 0.25
+MAX_ZOOM = 4096.0
+ZOOM_STEP = 1.25
+# arrow key pan step in pixels
+PAN_STEP = 60
+# turn timeline along the bottom edge: height, margin and hit slack
+TIMELINE_HEIGHT = 6
+TIMELINE_MARGIN = 16
+TIMELINE_SLACK = 10
+COLOR_TIMELINE = (69, 71, 90)
+
 
 class Visualizer:
     """Handles pygame rendering for the drone network simulation."""
@@ -47,10 +72,42 @@ class Visualizer:
         self.font_label = pygame.font.SysFont("Arial", 13, bold=True)
         self.font_small = pygame.font.SysFont("Arial", 11, bold=True)
 
+        # zones and connections in index order, for the spatial grids
+        self._zones = list(self.graph.zones.values())
+        zone_ids = {zone.name: i for i, zone in enumerate(self._zones)}
+        links = [
+            (zone_ids[c.zone1], zone_ids[c.zone2])
+            for c in self.graph.connections.values()
+            if c.zone1 in zone_ids and c.zone2 in zone_ids
+        ]
+        self._link_a = np.array([a for a, _ in links], dtype=np.int64)
+        self._link_b = np.array([b for _, b in links], dtype=np.int64)
+
+        # camera over the fitted layout: screen = layout * zoom + camera
+        self.zoom = 1.0
+        self.cam_x = 0.0
+        self.cam_y = 0.0
+        # mouse position while a drag pans the view
+        self._drag: tuple[int, int] | None = None
+
         # compute map scale and centering offsets
         self.scale, self.offset_x, self.offset_y, self.max_y = (
             self._calculate_layout()
         )
+        self._build_index()
+
+        # zone name labels, rendered on first use
+        self._labels: dict[str, pygame.Surface] = {}
+        # static map layer, rendered once and blitted every frame
+        self._background: pygame.Surface | None = None
+        # pixel value of each zone's fill color for dense views
+        self._zone_colors: npt.NDArray[np.uint32] | None = None
+        # whether the layer was last fully drawn by _render_dense()
+        self._dense = False
+        # drone sprites and their center offset, keyed by (drone id, size)
+        self._sprites: dict[
+            tuple[str, int], tuple[pygame.Surface, tuple[int, int]]
+        ] = {}
 
     def _calculate_layout(self) -> tuple[float, float, float, int]:
         """Computes scaling and offsets to center the map nicely.
@@ -82,6 +139,21 @@ class Visualizer:
 
         return scale, offset_x, offset_y, max_y
 
+    def zone_to_layout(self, zone: Zone) -> tuple[float, float]:
+        """Converts map coordinates to pixels of the fitted layout.
+
+        Layout pixels are screen pixels before the camera is applied.
+
+        Args:
+            zone: Zone dataclass instance with x, y coordinates.
+
+        Returns:
+            Tuple of (layout_x, layout_y).
+        """
+        lx = zone.x * self.scale + self.offset_x
+        ly = (self.max_y - zone.y) * self.scale + self.offset_y
+        return lx, ly
+
     def zone_to_pixel(self, zone: Zone) -> tuple[int, int]:
         """Converts map coordinates to screen pixels.
 
@@ -91,10 +163,51 @@ class Visualizer:
         Returns:
             Tuple of (pixel_x, pixel_y).
         """
-        px = int(zone.x * self.scale + self.offset_x)
-        py = int((self.max_y - zone.y) * self.scale + self.offset_y)
+        lx, ly = self.zone_to_layout(zone)
+        # floor, not int(), so that scrolled layers line up off screen
+        px = math.floor(lx * self.zoom + self.cam_x)
+        py = math.floor(ly * self.zoom + self.cam_y)
         return px, py
 
+    def layout_to_screen(
+        self, points: npt.NDArray[np.float64]
+    ) -> npt.NDArray[np.float64]:
+        """Applies the camera to an (n, 2) array of layout pixels."""
+        camera = np.array([self.cam_x, self.cam_y], dtype=np.float64)
+        screen: npt.NDArray[np.float64] = points * self.zoom + camera
+        return screen
+
+    def _build_index(self) -> None:
+        """Indexes zones and connection boxes in layout pixels.
+
+        Also sets the zoom above which zone labels are drawn. Runs
+        whenever the layout changes.
+        """
+        xy = np.array(
+            [self.zone_to_layout(zone) for zone in self._zones],
+            dtype=np.float64,
+        ).reshape(len(self._zones), 2)
+        self._zone_xy = xy
+        zx, zy = xy[:, 0], xy[:, 1]
+        ax, ay = zx[self._link_a], zy[self._link_a]
+        bx, by = zx[self._link_b], zy[self._link_b]
+        lengths = np.hypot(bx - ax, by - ay)
+
+        # about two zones per cell, but no smaller than a typical link so
+        # that links rarely span many cells
+        area = self.width * self.height
+        cell = np.sqrt(2 * area / max(len(self._zones), 1))
+        if lengths.size:
+            cell = max(cell, float(np.median(lengths)))
+        self._zone_index = SpatialGrid(zx, zy, zx, zy, cell)
+        self._link_index = SpatialGrid(
+            np.minimum(ax, bx), np.minimum(ay, by),
+            np.maximum(ax, bx), np.maximum(ay, by),
+            cell,
+        )
+        median = float(np.median(lengths)) if lengths.size else 0.0
+        self.label_zoom = LABEL_SPACING / median if median > 0 else 0.0
+
     def recalculate_on_resize(self, new_width: int, new_height: int) -> None:
         """Updates display dimensions and recalculates layout on resize.
 
@@ -110,6 +223,115 @@ class Visualizer:
         self.scale, self.offset_x, self.offset_y, self.max_y = (
             self._calculate_layout()
         )
+        self._build_index()
+        self.fit_view()
+
+    def fit_view(self) -> None:
+        """Resets the camera so the whole map fits the window."""
+        self.zoom = 1.0
+        self.cam_x = 0.0
+        self.cam_y = 0.0
+        self._background = None
+
+    def zoom_at(self, factor: float, pos: tuple[int, int]) -> None:
+        """Zooms the camera, keeping one screen point fixed.
+
+        Args:
+            factor: Zoom multiplier, above 1 to zoom in.
+            pos: Screen pixel that stays under the cursor.
+        """
+        zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        factor = zoom / self.zoom
+        self.cam_x = pos[0] - (pos[0] - self.cam_x) * factor
+        self.cam_y = pos[1] - (pos[1] - self.cam_y) * factor
+        self.zoom = zoom
+        self._background = None
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Moves the view by a number of screen pixels.
+
+        Args:
+            dx: Horizontal shift, positive to move the map right.
+            dy: Vertical shift, positive to move the map down.
+        """
+        self.cam_x += dx
+        self.cam_y += dy
+        layer = self._background
+        sx, sy = int(dx), int(dy)
+        w, h = self.width, self.height
+        if (
+            layer is None or sx != dx or sy != dy
+            or abs(sx) >= w or abs(sy) >= h
+        ):
+            self._background = None
+            return
+        # shift the map layer and render only the uncovered strips
+        layer.scroll(sx, sy)
+        strips = []
+        if sx > 0:
+            strips.append(pygame.Rect(0, 0, sx, h))
+        elif sx < 0:
+            strips.append(pygame.Rect(w + sx, 0, -sx, h))
+        if sy > 0:
+            strips.append(pygame.Rect(0, 0, w, sy))
+        elif sy < 0:
+            strips.append(pygame.Rect(0, h + sy, w, -sy))
+        for strip in strips:
+            self.render_map(layer, strip)
+
+    def handle_event(self, event: pygame.event.Event) -> bool:
+        """Applies camera controls: wheel or +/- zoom, drag or arrows pan,
+        F fits the map.
+
+        Args:
+            event: Pygame event from the main loop.
+
+        Returns:
+            True if the event was a camera control.
+        """
+        if event.type == pygame.MOUSEWHEEL:
+            factor = ZOOM_STEP ** event.y
+            self.zoom_at(factor, pygame.mouse.get_pos())
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            self._drag = event.pos
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button in (1, 3):
+            self._drag = None
+            return True
+        if event.type == pygame.MOUSEMOTION and self._drag is not None:
+            x, y = event.pos
+            self.pan(x - self._drag[0], y - self._drag[1])
+            self._drag = (x, y)
+            return True
+        if event.type != pygame.KEYDOWN:
+            return False
+        center = (self.width // 2, self.height // 2)
+        pans = {
+            pygame.K_LEFT: (PAN_STEP, 0),
+            pygame.K_RIGHT: (-PAN_STEP, 0),
+            pygame.K_UP: (0, PAN_STEP),
+            pygame.K_DOWN: (0, -PAN_STEP),
+        }
+        if event.key in pans:
+            self.pan(*pans[event.key])
+        elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.zoom_at(ZOOM_STEP, center)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom_at(1 / ZOOM_STEP, center)
+        elif event.key == pygame.K_f:
+            self.fit_view()
+        else:
+            return False
+        return True
+
+    def invalidate_background(self) -> None:
+        """Drops the static map layer so the next frame renders it again.
+
+        Call after changing anything the layer shows, e.g. zone colors.
+        """
+        self._background = None
+        self._zone_colors = None
 
     def _get_zone_type_color(self, zone_type: str) -> tuple[int, int, int]:
         """Maps zone type to standard color tuple."""
@@ -134,26 +356,97 @@ class Visualizer:
         return self._get_zone_type_color(zone.zone_type)
 
     def draw_background(self) -> None:
-        """Draws background, connections, zone nodes, and labels."""
-        self.screen.fill(COLOR_BG)
+        """Draws background, connections, zone nodes, and labels.
+
+        The map never changes between frames, so it is rendered once to
+        an offscreen layer that is then blitted. The layer is rebuilt on
+        resize, zoom or after invalidate_background(); pans scroll it.
+        """
+        if self._background is None:
+            layer = pygame.Surface((self.width, self.height)).convert()
+            self.render_map(layer)
+            self._background = layer
+        self.screen.blit(self._background, (0, 0))
+
+    def _view(
+        self, area: pygame.Rect, margin: float
+    ) -> tuple[float, float, float, float]:
+        """Returns a screen area as a layout rectangle, grown by a margin.
+
+        Args:
+            area: Screen rectangle.
+            margin: Extra screen pixels on every side.
+
+        Returns:
+            Tuple of (x0, y0, x1, y1) in layout pixels.
+        """
+        z = self.zoom
+        return (
+            (area.left - margin - self.cam_x) / z,
+            (area.top - margin - self.cam_y) / z,
+            (area.right + margin - self.cam_x) / z,
+            (area.bottom + margin - self.cam_y) / z,
+        )
+
+    def _label(
+        self, zone: Zone, color: tuple[int, int, int]
+    ) -> pygame.Surface:
+        """Returns the rendered name of a zone, cached by name."""
+        label = self._labels.get(zone.name)
+        if label is None:
+            label = self.font_label.render(zone.name, True, color)
+            self._labels[zone.name] = label
+        return label
+
+    def render_map(
+        self, target: pygame.Surface, area: pygame.Rect | None = None
+    ) -> None:
+        """Renders background, connections, zone nodes, and labels.
+
+        Only zones and connections in view are drawn, found through the
+        spatial grids. Labels need a zoom of at least `label_zoom`, and
+        crowded views are drawn as pixels by _render_dense().
+
+        Args:
+            target: Surface to draw on, the size of the window.
+            area: Part of the window to redraw; the whole window if None.
+                Partial redraws keep the style of the last full one.
+        """
+        if area is None:
+            area = target.get_rect()
+            full = True
+        else:
+            full = False
+        target.set_clip(area)
+        target.fill(COLOR_BG)
+        margin = ZONE_RADIUS + 28
+        zone_ids = self._zone_index.query(*self._view(area, margin))
+        link_ids = self._link_index.query(*self._view(area, 3))
+        if full:
+            self._dense = len(zone_ids) > DOT_LIMIT
+        if self._dense:
+            self._render_dense(target, area, zone_ids, link_ids)
+            target.set_clip(None)
+            return
 
         # 1. draw connection lines behind nodes
-        for connection in self.graph.connections.values():
-            z1 = self.graph.get_zone(connection.zone1)
-            z2 = self.graph.get_zone(connection.zone2)
-            if z1 and z2:
-                p1 = self.zone_to_pixel(z1)
-                p2 = self.zone_to_pixel(z2)
-                pygame.draw.line(self.screen, COLOR_LINE, p1, p2, 3)
+        zones = self._zones
+        for a, b in zip(
+            self._link_a[link_ids].tolist(), self._link_b[link_ids].tolist()
+        ):
+            p1 = self.zone_to_pixel(zones[a])
+            p2 = self.zone_to_pixel(zones[b])
+            pygame.draw.line(target, COLOR_LINE, p1, p2, 3)
 
         # 2. draw zone circles and borders
-        radius = 24
-        for zone in self.graph.zones.values():
+        radius = ZONE_RADIUS
+        labels = self.zoom >= self.label_zoom
+        for zone in (zones[i] for i in zone_ids.tolist()):
             pos = self.zone_to_pixel(zone)
             fill_color = self._get_zone_fill_color(zone)
 
             # fill node circle
-            pygame.draw.circle(self.screen, fill_color, pos, radius)
+            pygame.draw.circle(target, fill_color, pos, radius)
 
             # border ring: start/end hubs get distinct highlighted borders
             if zone == self.graph.start_zone:
@@ -163,19 +456,102 @@ class Visualizer:
             else:
                 border_color = self._get_zone_type_color(zone.zone_type)
 
-            pygame.draw.circle(self.screen, border_color, pos, radius + 4, 3)
+            pygame.draw.circle(target, border_color, pos, radius + 4, 3)
 
+            if not labels:
+                continue
             # text label above zone node
             text_color = (
                 border_color
                 if zone in (self.graph.start_zone, self.graph.end_zone)
                 else COLOR_TEXT
             )
-            name_surf = self.font_label.render(zone.name, True, text_color)
+            name_surf = self._label(zone, text_color)
             name_rect = name_surf.get_rect(
                 center=(pos[0], pos[1] - radius - 14)
             )
-            self.screen.blit(name_surf, name_rect)
+            target.blit(name_surf, name_rect)
+        target.set_clip(None)
+
+    def _render_dense(
+        self,
+        target: pygame.Surface,
+        area: pygame.Rect,
+        zone_ids: npt.NDArray[np.int64],
+        link_ids: npt.NDArray[np.int64],
+    ) -> None:
+        """Draws a crowded view as pixels: links as lines one pixel wide,
+        zones as 3x3 squares, start and end hubs as small circles.
+
+        Args:
+            target: Surface to draw on, the size of the window.
+            area: Part of the window to draw in.
+            zone_ids: Zones in view.
+            link_ids: Connections in view.
+        """
+        x0, y0 = area.left, area.top
+        aw, ah = area.width, area.height
+        xy = self.layout_to_screen(self._zone_xy)
+        # float32 is exact enough for pixels and halves the sampling cost
+        zx = (xy[:, 0] - x0).astype(np.float32)
+        zy = (xy[:, 1] - y0).astype(np.float32)
+        # pixels are written to a flat image of the area, then blitted
+        layer = pygame.Surface((aw, ah), 0, target)
+        image = np.full(aw * ah, layer.map_rgb(COLOR_BG), dtype=np.uint32)
+
+        # sample every link once per pixel of its longer side, except
+        # the pixels next to its ends, which the zone squares cover
+        a, b = self._link_a[link_ids], self._link_b[link_ids]
+        ax, ay = zx[a], zy[a]
+        dx, dy = zx[b] - ax, zy[b] - ay
+        length = np.maximum(np.abs(dx), np.abs(dy))
+        steps = np.clip(
+            length.astype(np.int64) - 3, 0, self.width + self.height
+        )
+        rank = (
+            np.arange(int(steps.sum()), dtype=np.int32)
+            - np.repeat((np.cumsum(steps) - steps - 2).astype(np.int32), steps)
+        ).astype(np.float32)
+        share = 1.0 / np.maximum(length, 1.0)
+        lx = np.repeat(ax, steps) + rank * np.repeat(dx * share, steps)
+        ly = np.repeat(ay, steps) + rank * np.repeat(dy * share, steps)
+        inside = (lx >= 0) & (lx < aw) & (ly >= 0) & (ly < ah)
+        px = np.floor(lx[inside]).astype(np.int64)
+        py = np.floor(ly[inside]).astype(np.int64)
+        image[py * aw + px] = layer.map_rgb(COLOR_LINE)
+
+        # zone squares, colored like the circles' fill
+        if self._zone_colors is None:
+            self._zone_colors = np.array(
+                [
+                    layer.map_rgb(self._get_zone_fill_color(zone))
+                    for zone in self._zones
+                ],
+                dtype=np.uint32,
+            )
+        cx = np.floor(zx[zone_ids]).astype(np.int64)
+        cy = np.floor(zy[zone_ids]).astype(np.int64)
+        colors = self._zone_colors[zone_ids]
+        # squares fully inside the area need no per-pixel test
+        inner = (cx > 0) & (cx < aw - 1) & (cy > 0) & (cy < ah - 1)
+        centers = cy[inner] * aw + cx[inner]
+        inner_colors = colors[inner]
+        ex, ey, edge_colors = cx[~inner], cy[~inner], colors[~inner]
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                image[centers + (oy * aw + ox)] = inner_colors
+                x, y = ex + ox, ey + oy
+                inside = (x >= 0) & (x < aw) & (y >= 0) & (y < ah)
+                image[y[inside] * aw + x[inside]] = edge_colors[inside]
+        pygame.surfarray.blit_array(layer, image.reshape(ah, aw).T)
+        target.blit(layer, area)
+
+        for zone, color in (
+            (self.graph.start_zone, COLOR_START),
+            (self.graph.end_zone, COLOR_END),
+        ):
+            pos = self.zone_to_pixel(zone)
+            pygame.draw.circle(target, color, pos, ZONE_RADIUS // 2)
 
     def draw_legend(self) -> None:
         """Draws the zone type indicators and keybind controls."""
@@ -194,10 +570,14 @@ class Visualizer:
             y += 18
 
         # controls hint
-        ctrls_surf = self.font_small.render(
-            "[SPACE] Move  [R] Reset  [ESC] Exit", True, COLOR_TEXT
-        )
-        self.screen.blit(ctrls_surf, (x, y + 6))
+        for hint in (
+            "[SPACE] Move  [BACKSPACE] Back  [R] Reset  [ESC] Exit",
+            "[HOME/END/PGUP/PGDN] Seek  [Click timeline] Scrub",
+            "[Wheel/+/-] Zoom  [Drag/Arrows] Pan  [F] Fit",
+        ):
+            ctrls_surf = self.font_small.render(hint, True, COLOR_TEXT)
+            self.screen.blit(ctrls_surf, (x, y + 6))
+            y += 16
 
     def draw_turn_counter(self, current_turn: int, max_turns: int) -> None:
         """Draws turn counter text in the top-right corner.
@@ -211,27 +591,55 @@ class Visualizer:
         pos_x = self.width - text_surf.get_width() - 16
         self.screen.blit(text_surf, (pos_x, 16))
 
-    def draw_drone(self, drone_id: str, pos: tuple[float, float]) -> None:
-        """Draws a drone sprite at the specified pixel coordinates.
+    def drone_sprite(
+        self, drone_id: str, size: int = 12
+    ) -> tuple[pygame.Surface, tuple[int, int]]:
+        """Returns the sprite of a drone, rendering it on first use.
+
+        The sprite holds the cross arms, rotors, body and the ID pill
+        badge below them, on a transparent background.
 
         Args:
             drone_id: Unique drone identifier string (e.g. 'D1').
-            pos: Tuple of (x, y) float coordinates.
+            size: Drone size in pixels.
+
+        Returns:
+            Tuple of (sprite, (dx, dy)), where (dx, dy) is the position of
+            the drone's center inside the sprite.
         """
-        x, y = int(pos[0]), int(pos[1])
-        size = 12
+        key = (drone_id, size)
+        cached = self._sprites.get(key)
+        if cached is not None:
+            return cached
+
         offset = int(size * 0.7)
+        rotor_r = max(int(size * 0.35), 2)
+        body_r = max(int(size * 0.6), 3)
+
+        label = self.font_small.render(drone_id, True, COLOR_TEXT)
+        pad_x, pad_y = 4, 2
+        pill_w = label.get_width() + pad_x * 2
+        pill_h = label.get_height() + pad_y * 2
+
+        # sprite bounds around the center: rotors above, badge below
+        reach = max(offset + rotor_r, body_r)
+        half_w = max(reach, (pill_w + 1) // 2)
+        bottom = max(reach, size + 10 + (pill_h + 1) // 2)
+        sprite = pygame.Surface(
+            (half_w * 2 + 1, reach + bottom + 1), pygame.SRCALPHA
+        ).convert_alpha()
+        x, y = half_w, reach
 
         # cross arms
         pygame.draw.line(
-            self.screen,
+            sprite,
             COLOR_DRONE_ARM,
             (x - offset, y - offset),
             (x + offset, y + offset),
             2,
         )
         pygame.draw.line(
-            self.screen,
+            sprite,
             COLOR_DRONE_ARM,
             (x - offset, y + offset),
             (x + offset, y - offset),
@@ -239,30 +647,111 @@ class Visualizer:
         )
 
         # rotors at endpoints
-        rotor_r = max(int(size * 0.35), 2)
         for dx, dy in [(-1, -1), (1, 1), (-1, 1), (1, -1)]:
             rx, ry = x + dx * offset, y + dy * offset
-            pygame.draw.circle(
-                self.screen, COLOR_DRONE_ROTOR, (rx, ry), rotor_r
-            )
+            pygame.draw.circle(sprite, COLOR_DRONE_ROTOR, (rx, ry), rotor_r)
 
         # central body
-        body_r = max(int(size * 0.6), 3)
-        pygame.draw.circle(self.screen, COLOR_DRONE_BODY, (x, y), body_r)
+        pygame.draw.circle(sprite, COLOR_DRONE_BODY, (x, y), body_r)
 
         # drone id pill badge centered below sprite
-        label = self.font_small.render(drone_id, True, COLOR_TEXT)
-        pad_x, pad_y = 4, 2
-        pill_w = label.get_width() + pad_x * 2
-        pill_h = label.get_height() + pad_y * 2
-
-        pill_surf = pygame.Surface((pill_w, pill_h), pygame.SRCALPHA)
         pill_rect = pygame.Rect(0, 0, pill_w, pill_h)
+        pill_rect.center = (x, y + size + 10)
+        pygame.draw.rect(
+            sprite, COLOR_LABEL_BG, pill_rect, border_radius=pill_h // 2
+        )
+        sprite.blit(label, label.get_rect(center=pill_rect.center))
+
+        self._sprites[key] = (sprite, (x, y))
+        return sprite, (x, y)
+
+    def draw_drone_layer(
+        self,
+        sprites: list[pygame.Surface],
+        positions: npt.NDArray[np.float64],
+        anchors: npt.NDArray[np.int64],
+    ) -> None:
+        """Draws drones given in layout pixels, skipping those out of view.
+
+        Args:
+            sprites: Sprite of each drone, from drone_sprite().
+            positions: (n, 2) layout pixels of the drone centers.
+            anchors: (n, 2) center offsets inside each sprite.
+        """
+        corners = np.floor(self.layout_to_screen(positions)).astype(np.int64)
+        corners -= anchors
+        # sprites are smaller than a zone and its label
+        margin = 2 * ZONE_RADIUS + 28
+        x, y = corners[:, 0], corners[:, 1]
+        visible = (
+            (x > -margin) & (x < self.width) & (y > -margin)
+            & (y < self.height)
+        )
+        self.draw_sprites(
+            compress(sprites, visible.tolist()), corners[visible].tolist()
+        )
+
+    def draw_sprites(
+        self,
+        sprites: Iterable[pygame.Surface],
+        corners: Iterable[Sequence[int]],
+    ) -> None:
+        """Blits sprites at their top-left corners in one call.
+
+        Args:
+            sprites: Sprites from drone_sprite(), drawn in order.
+            corners: Top-left (x, y) pixel position of each sprite.
+        """
+        self.screen.blits(list(zip(sprites, corners)), doreturn=False)
+
+    def _timeline_rect(self) -> pygame.Rect:
+        """Returns the screen rectangle of the turn timeline."""
+        return pygame.Rect(
+            TIMELINE_MARGIN,
+            self.height - TIMELINE_MARGIN - TIMELINE_HEIGHT,
+            self.width - 2 * TIMELINE_MARGIN,
+            TIMELINE_HEIGHT,
+        )
+
+    def draw_timeline(self, current_turn: int, max_turns: int) -> None:
+        """Draws the turn timeline with the current turn's position.
+
+        Args:
+            current_turn: Current turn number.
+            max_turns: Total turns in the simulation.
+        """
+        bar = self._timeline_rect()
+        radius = TIMELINE_HEIGHT // 2
         pygame.draw.rect(
-            pill_surf, COLOR_LABEL_BG, pill_rect, border_radius=pill_h // 2
+            self.screen, COLOR_TIMELINE, bar, border_radius=radius
+        )
+        share = current_turn / max_turns if max_turns else 1.0
+        done = bar.copy()
+        done.width = max(int(bar.width * share), TIMELINE_HEIGHT)
+        pygame.draw.rect(
+            self.screen, COLOR_DRONE_ROTOR, done, border_radius=radius
+        )
+        pygame.draw.circle(
+            self.screen, COLOR_TEXT, (done.right, bar.centery), radius + 3
         )
 
-        pill_screen_rect = pill_surf.get_rect(center=(x, y + size + 10))
-        self.screen.blit(pill_surf, pill_screen_rect)
-        label_rect = label.get_rect(center=pill_screen_rect.center)
-        self.screen.blit(label, label_rect)
+    def timeline_turn(
+        self, pos: tuple[int, int], max_turns: int, clamp: bool = False
+    ) -> int | None:
+        """Converts a screen position on the timeline to a turn.
+
+        Args:
+            pos: Screen pixel, e.g. a mouse position.
+            max_turns: Total turns in the simulation.
+            clamp: Accept any position, as while dragging the knob.
+
+        Returns:
+            The turn under the position, or None if it is off the
+            timeline and clamp is False.
+        """
+        bar = self._timeline_rect()
+        hit = bar.inflate(2 * TIMELINE_SLACK, 2 * TIMELINE_SLACK)
+        if not clamp and not hit.collidepoint(pos):
+            return None
+        share = (pos[0] - bar.left) / max(bar.width, 1)
+        return round(min(max(share, 0.0), 1.0) * max_turns)
@@ -0,0 +1,122 @@
+# waves.py - route reuse: dispatch drones on cached routes in waves
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from pathfinder import Pathfinder
+
+
+class WavePlanner:
+    """Prioritized planning that reuses routes instead of searching.
+
+    Drones that share a start turn form a wave. For each drone, the cached
+    routes (wait-free zone sequences taken from earlier searches) are
+    shifted to later departures and re-checked against the reservation
+    table. A shifted route is only accepted if it arrives no later than the
+    previous drone or the static lower bound, whichever is later, plus
+    `slack` turns. Only when no cached route meets that bound does the
+    drone get a full search, whose route then joins the cache.
+    """
+
+    def __init__(
+        self,
+        pathfinder: "Pathfinder",
+        slack: int = 0,
+        max_routes: int = 8,
+    ) -> None:
+        self.pathfinder = pathfinder
+        self.slack = slack
+        self.max_routes = max_routes
+        # cached routes, most recently used first
+        self.routes: list[list[int]] = []
+        # drones served from cached routes / by a fresh search
+        self.cached = 0
+        self.searched = 0
+
+    def _from_cache(
+        self, start_turn: int, bound: int
+    ) -> list[tuple[int, int]] | None:
+        """Finds the earliest-arriving cached route that fits.
+
+        Args:
+            start_turn: Earliest departure of the drone.
+            bound: Latest acceptable arrival turn.
+
+        Returns:
+            The shifted (turn, zone_id) path, or None.
+        """
+        cg = self.pathfinder.graph
+        best: list[tuple[int, int]] | None = None
+        best_k = -1
+        for k, route in enumerate(self.routes):
+            length = sum(cg.move_cost[z] for z in route[1:])
+            # only departures that can still beat the best fit so far
+            last = bound if best is None else best[-1][0] - 1
+            for departure in range(start_turn, last - length + 1):
+                path = self.pathfinder._route_at(route, departure)
+                if path is not None:
+                    best, best_k = path, k
+                    break
+        if best_k > 0:
+            self.routes.insert(0, self.routes.pop(best_k))
+        return best
+
+    def _remember(self, path: list[tuple[int, int]]) -> None:
+        """Adds the wait-free route of a searched path to the cache.
+
+        Args:
+            path: A (turn, zone_id) path from a full search.
+        """
+        route = [path[0][1]]
+        for _, zone in path[1:]:
+            if zone != route[-1]:
+                route.append(zone)
+        if route in self.routes:
+            self.routes.remove(route)
+        self.routes.insert(0, route)
+        del self.routes[self.max_routes:]
+
+    def stream(self, sink: Callable[[list[tuple[int, int]]], None]) -> int:
+        """Plans drones in index order, reusing cached routes when possible.
+
+        Args:
+            sink: Called once per drone with its (turn, zone_id) path.
+
+        Returns:
+            The makespan, i.e. the latest arrival turn over all drones.
+        """
+        pf = self.pathfinder
+        lower_bound = pf.graph.distances_to_end()[pf.graph.start]
+        makespan = 0
+        last_arrival = 0
+        stats = pf.stats
+
+        for i in range(pf.nb_drones):
+            # same start stagger as prioritized planning
+            start_turn = pf._start_turn(i)
+            if pf.windowed:
+                pf.reservations.release_before(start_turn)
+
+            if stats is not None:
+                stats.begin_drone(i, pf)
+            bound = max(start_turn + lower_bound, last_arrival) + self.slack
+            path = self._from_cache(start_turn, bound)
+            if path is not None:
+                self.cached += 1
+            else:
+                path = pf._find_path(start_turn)
+                if not path:
+                    raise ValueError(
+                        f"[ERROR] D{i + 1} could not find a path to the goal!"
+                        "\nPathfinding is impossible on this map."
+                    )
+                self.searched += 1
+                self._remember(path)
+
+            pf._reserve_path(path)
+            if stats is not None:
+                stats.end_drone(pf)
+            last_arrival = path[-1][0]
+            makespan = max(makespan, last_arrival)
+            sink(path)
+
+        return makespan